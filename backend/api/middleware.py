@@ -0,0 +1,31 @@
+"""
+HTTP middleware
+"""
+
+from typing import Iterable
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZip compression for JSON responses, skipping paths that must not be compressed
+    
+    - Server-sent events: GZipMiddleware buffers streamed bodies, which would hold
+      back progress frames until the response ends
+    - Audio responses: MP3 is already compressed
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, compresslevel: int = 6,
+                 exclude_paths: Iterable[str] = ()) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_paths = tuple(exclude_paths)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            if scope["path"].startswith(self.exclude_paths) or \
+                    "text/event-stream" in Headers(scope=scope).get("accept", ""):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
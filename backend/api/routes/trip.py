@@ -2,16 +2,25 @@
 Trip Planning API Routes
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional, List, Dict
+import asyncio
 import logging
+import os
+import sys
+import time
+import traceback
+from collections import OrderedDict
+import orjson
 from llm.orchestrator import LLMOrchestrator
 from core.session_manager import SessionManager
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/trip", tags=["trip"])
+router = APIRouter(prefix="/api/trip", tags=["trip"], default_response_class=ORJSONResponse)
 
 # Initialize orchestrator (singleton)
 _orchestrator = None
@@ -25,10 +34,133 @@ def get_orchestrator() -> LLMOrchestrator:
 
 def get_session_manager() -> SessionManager:
     """Get session manager from orchestrator"""
-    orchestrator = get_orchestrator()
+    orchestrator = _orchestrator or get_orchestrator()
     return orchestrator.session_manager
 
 
+@router.on_event("startup")
+async def warm_orchestrator():
+    """Create the orchestrator up front so the first request doesn't pay for it"""
+    if _orchestrator is not None or os.getenv("WARM_ORCHESTRATOR_ON_STARTUP", "true").lower() != "true":
+        return
+    try:
+        await asyncio.to_thread(get_orchestrator)
+        logger.info("Orchestrator initialized on startup")
+    except Exception as e:
+        # Leave it to the first request to retry (and report the error)
+        logger.warning(f"Could not initialize orchestrator on startup: {e}")
+
+
+# Itinerary shape: days and time slots every client expects to be present
+_DAY_KEYS = tuple(sys.intern(f"day_{i}") for i in (1, 2, 3))
+_SLOT_KEYS = (sys.intern("morning"), sys.intern("afternoon"), sys.intern("evening"))
+
+
+def _build_itinerary_normalizer():
+    """
+    Generate _normalize_itinerary specialized for the fixed day/slot shape
+    
+    The generated function has no loops - each day and slot check is straight-line
+    code with constant keys.
+    """
+    lines = ["def _normalize_itinerary(itinerary):"]
+    for day_key in _DAY_KEYS:
+        lines.append(f"    day = itinerary.get({day_key!r})")
+        lines.append("    if day:")
+        for slot_key in _SLOT_KEYS:
+            lines.append(f"        if not isinstance(day.get({slot_key!r}), list):")
+            lines.append(f"            day[{slot_key!r}] = []")
+    lines.append("    return itinerary")
+    
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    normalizer = namespace["_normalize_itinerary"]
+    normalizer.__doc__ = "Ensure every present day has all time slots as lists (even if empty), in place"
+    return normalizer
+
+
+_normalize_itinerary = _build_itinerary_normalizer()
+
+
+# SSE progress events are coalesced into one frame per window or per max batch size
+STREAM_FLUSH_INTERVAL_MS = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "50"))
+STREAM_MAX_EVENTS_PER_FRAME = int(os.getenv("STREAM_MAX_EVENTS_PER_FRAME", "16"))
+
+
+def _sse_frame(payload: Dict) -> bytes:
+    """Format a payload as a server-sent event"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+# Chat turns are serialized per session. A request repeating the previous message
+# before its answer came back (e.g. a double-clicked Send) reuses that answer
+CHAT_DUPLICATE_WINDOW_SECONDS = float(os.getenv("CHAT_DUPLICATE_WINDOW_SECONDS", "30"))
+
+
+class _ChatTurnState:
+    """Per-session chat bookkeeping"""
+    
+    __slots__ = ("lock", "completed_turns", "last_used",
+                 "last_message", "last_turn", "last_result", "last_result_at")
+    
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.completed_turns = 0
+        self.last_used = 0.0
+        self.last_message: Optional[str] = None
+        self.last_turn = -1  # completed_turns when last_message arrived
+        self.last_result: Optional[Dict] = None
+        self.last_result_at = 0.0
+
+
+_chat_turns: "OrderedDict[str, _ChatTurnState]" = OrderedDict()
+
+
+def _chat_turn_state(session_id: str) -> _ChatTurnState:
+    """Get (or create) the chat turn state for a session"""
+    now = time.monotonic()
+    # Drop idle sessions, least recently used first
+    while _chat_turns:
+        idle_id, idle_state = next(iter(_chat_turns.items()))
+        if idle_state.lock.locked() or now - idle_state.last_used < CHAT_DUPLICATE_WINDOW_SECONDS:
+            break
+        del _chat_turns[idle_id]
+    
+    state = _chat_turns.get(session_id)
+    if state is None:
+        state = _chat_turns[session_id] = _ChatTurnState()
+    else:
+        _chat_turns.move_to_end(session_id)
+    state.last_used = now
+    return state
+
+
+async def _run_request(orchestrator: LLMOrchestrator, message: str, session_id: str) -> Dict:
+    """Process a chat request, one at a time per session"""
+    state = _chat_turn_state(session_id)
+    arrived_at_turn = state.completed_turns
+    
+    async with state.lock:
+        if (message == state.last_message and arrived_at_turn == state.last_turn
+                and time.monotonic() - state.last_result_at < CHAT_DUPLICATE_WINDOW_SECONDS):
+            logger.info(f"Duplicate request for session {session_id}, reusing previous result")
+            return state.last_result
+        
+        # Off the event loop - the LLM tool chain is blocking I/O
+        result = await asyncio.to_thread(
+            orchestrator.process_user_request,
+            user_message=message,
+            session_id=session_id
+        )
+        
+        state.completed_turns += 1
+        state.last_message = message
+        state.last_turn = arrived_at_turn
+        state.last_result = result
+        state.last_result_at = time.monotonic()
+        return result
+
+
 # Request/Response Models
 class TripRequest(BaseModel):
     """Request model for trip planning"""
@@ -54,8 +186,99 @@ class ErrorResponse(BaseModel):
     details: Optional[str] = Field(None, description="Additional error details")
 
 
-@router.post("/chat", response_model=TripResponse, responses={500: {"model": ErrorResponse}})
-async def chat(request: TripRequest, orchestrator: LLMOrchestrator = Depends(get_orchestrator)):
+# Chat endpoints read the raw body themselves, so document it explicitly
+_TRIP_REQUEST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": TripRequest.model_json_schema()}}
+    }
+}
+
+
+async def _parse_trip_request(http_request: Request) -> TripRequest:
+    """
+    Validate the request body straight from the raw JSON bytes
+    
+    pydantic-core parses and validates in a single pass, instead of FastAPI
+    decoding to Python objects first and validating those.
+    """
+    try:
+        return TripRequest.model_validate_json(await http_request.body())
+    except ValidationError as e:
+        # Same 422 shape FastAPI produces for body validation errors
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors)
+
+
+def _unique_sources(session: Dict) -> List[Dict]:
+    """Deduplicated sources (by URL, max 10), cached until the orchestrator adds more"""
+    version = session.get("sources_version", 0)
+    cached = session.get("unique_sources")
+    if cached and cached[0] == version:
+        return cached[1]
+    
+    unique = {}
+    for source in session.get("sources") or []:
+        url = source.get("url")
+        if url:
+            # The first citation of a URL wins
+            unique.setdefault(url, source)
+    unique_sources = list(unique.values())[:10]
+    session["unique_sources"] = (version, unique_sources)
+    return unique_sources
+
+
+async def _resolve_session(orchestrator: LLMOrchestrator, session_id: Optional[str]) -> str:
+    """Return the given session ID if it is still live, otherwise create a new session"""
+    session_manager = orchestrator.session_manager
+    if not session_id:
+        session_id = await session_manager.acreate_session()
+        logger.info(f"Created new session: {session_id}")
+    else:
+        session = await session_manager.aget_session(session_id)
+        if not session:
+            session_id = await session_manager.acreate_session()
+            logger.info(f"Session expired, created new: {session_id}")
+    return session_id
+
+
+async def _build_trip_response(orchestrator: LLMOrchestrator, result: Dict) -> TripResponse:
+    """Build the chat response from an orchestrator result and the session state"""
+    # Start fetching the session (a store round trip when sessions are in Redis)
+    # and shape the orchestrator result while it is in flight
+    session_task = asyncio.create_task(orchestrator.session_manager.aget_session(result["session_id"]))
+    response_fields = {
+        "status": "success",
+        "response": result["response"],
+        "session_id": result["session_id"],
+        "tool_calls": result.get("tool_calls", []),
+        "usage": result.get("usage")
+    }
+    
+    # Get current itinerary and sources from session
+    session = await session_task
+    itinerary = session.get("current_itinerary") if session else None
+    
+    # Ensure itinerary structure is complete (once per stored itinerary)
+    if itinerary and not session.get("itinerary_normalized"):
+        _normalize_itinerary(itinerary)
+        session["itinerary_normalized"] = True
+    
+    sources = _unique_sources(session) if session else []
+    
+    # Built from data we just produced ourselves - skip field validation
+    return TripResponse.model_construct(**response_fields, itinerary=itinerary, sources=sources)
+
+
+# Error detail templates (see ErrorResponse)
+_VALIDATION_ERROR = {"status": "error", "error_type": "validation_error"}
+_SERVER_ERROR = {"status": "error", "error_type": "server_error"}
+_SERVER_ERROR_MESSAGE = "I'm having trouble processing your request right now. Error: "
+
+
+@router.post("/chat", response_model=TripResponse, responses={500: {"model": ErrorResponse}},
+             openapi_extra=_TRIP_REQUEST_OPENAPI)
+async def chat(http_request: Request):
     """
     Main chat endpoint for trip planning
     
@@ -65,128 +288,166 @@ async def chat(request: TripRequest, orchestrator: LLMOrchestrator = Depends(get
     - Answering questions
     - All user interactions
     """
+    request = await _parse_trip_request(http_request)
     try:
         logger.info(f"Received request: {request.message[:100]}...")
+        orchestrator = _orchestrator or get_orchestrator()
         
         # Get or create session
-        session_id = request.session_id
-        if not session_id:
-            session_id = orchestrator.session_manager.create_session()
-            logger.info(f"Created new session: {session_id}")
-        else:
-            session = orchestrator.session_manager.get_session(session_id)
-            if not session:
-                session_id = orchestrator.session_manager.create_session()
-                logger.info(f"Session expired, created new: {session_id}")
+        session_id = await _resolve_session(orchestrator, request.session_id)
         
         # Process request
-        result = orchestrator.process_user_request(
-            user_message=request.message,
-            session_id=session_id
-        )
-        
-        # Get current itinerary and sources from session
-        session = orchestrator.session_manager.get_session(session_id)
-        itinerary = session.get("current_itinerary") if session else None
-        
-        # Ensure itinerary structure is complete (all days have all time slots, even if empty)
-        if itinerary:
-            for day_key in ["day_1", "day_2", "day_3"]:
-                if day_key in itinerary and itinerary[day_key]:
-                    day = itinerary[day_key]
-                    # Ensure all time slots exist as arrays
-                    if "morning" not in day:
-                        day["morning"] = []
-                    if "afternoon" not in day:
-                        day["afternoon"] = []
-                    if "evening" not in day:
-                        day["evening"] = []
-                    # Ensure arrays are lists (not None)
-                    day["morning"] = day["morning"] if isinstance(day["morning"], list) else []
-                    day["afternoon"] = day["afternoon"] if isinstance(day["afternoon"], list) else []
-                    day["evening"] = day["evening"] if isinstance(day["evening"], list) else []
+        result = await _run_request(orchestrator, request.message, session_id)
         
-        sources = session.get("sources", []) if session else []
-        
-        # Deduplicate sources
-        if sources:
-            seen_urls = set()
-            unique_sources = []
-            for source in sources:
-                url = source.get("url", "")
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    unique_sources.append(source)
-            sources = unique_sources[:10]  # Limit to 10 sources
-        
-        return TripResponse(
-            status="success",
-            response=result["response"],
-            session_id=result["session_id"],
-            tool_calls=result.get("tool_calls", []),
-            usage=result.get("usage"),
-            itinerary=itinerary,
-            sources=sources
-        )
+        trip_response = await _build_trip_response(orchestrator, result)
+        # Serialize once here - returning the model would make FastAPI validate it
+        # against response_model again and encode it through jsonable_encoder
+        return Response(content=trip_response.model_dump_json(), media_type="application/json")
         
     except ValueError as e:
         # Validation errors
         logger.error(f"Validation error: {e}")
+        if await http_request.is_disconnected():
+            # 499 = client closed request (as logged by nginx) - no error body needed
+            return Response(status_code=499)
         raise HTTPException(
             status_code=400,
-            detail={
-                "status": "error",
-                "error_type": "validation_error",
-                "message": str(e),
-                "session_id": request.session_id
-            }
+            detail={**_VALIDATION_ERROR, "message": str(e), "session_id": request.session_id}
         )
     except Exception as e:
         # Generic errors
-        logger.error(f"Error processing request: {e}", exc_info=True)
-        import traceback
-        error_traceback = traceback.format_exc()
-        logger.error(f"Full traceback:\n{error_traceback}")
+        logger.error(f"Error processing request: {e}", exc_info=True)  # Logs the traceback too
+        if await http_request.is_disconnected():
+            return Response(status_code=499)
+        # Only format the traceback when it is returned to the client
+        error_traceback = traceback.format_exc() if logger.isEnabledFor(logging.INFO) else None
         raise HTTPException(
             status_code=500,
             detail={
-                "status": "error",
-                "error_type": "server_error",
-                "message": f"I'm having trouble processing your request right now. Error: {str(e)}",
+                **_SERVER_ERROR,
+                "message": _SERVER_ERROR_MESSAGE + str(e),
                 "session_id": request.session_id,
-                "details": error_traceback[-500:] if logger.level <= logging.INFO else None  # Last 500 chars of traceback
+                "details": error_traceback[-500:] if error_traceback else None  # Last 500 chars of traceback
             }
         )
 
 
+@router.post("/chat/stream", openapi_extra=_TRIP_REQUEST_OPENAPI)
+async def chat_stream(http_request: Request):
+    """
+    Streaming chat endpoint (server-sent events)
+    
+    Frames (each a JSON object with a "type"):
+    - ack: sent immediately with the session ID
+    - progress: batched tool events ({"type": "tool_call" | "tool_result", "function": ...})
+    - result: the final response, same fields as /chat
+    - error: same fields as ErrorResponse
+    """
+    request = await _parse_trip_request(http_request)
+    logger.info(f"Received stream request: {request.message[:100]}...")
+    orchestrator = _orchestrator or get_orchestrator()
+    session_id = await _resolve_session(orchestrator, request.session_id)
+    
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        
+        def on_event(event: Dict):
+            # Called from the worker thread
+            loop.call_soon_threadsafe(events.put_nowait, event)
+        
+        # Wait for any turn already running in this session
+        state = _chat_turn_state(session_id)
+        await state.lock.acquire()
+        
+        def on_done(_):
+            state.completed_turns += 1
+            state.lock.release()
+            events.put_nowait(None)
+        
+        task = asyncio.ensure_future(asyncio.to_thread(
+            orchestrator.process_user_request,
+            user_message=request.message,
+            session_id=session_id,
+            on_event=on_event
+        ))
+        task.add_done_callback(on_done)
+        
+        yield _sse_frame({"type": "ack", "session_id": session_id})
+        
+        # Coalesce progress events until the orchestrator finishes
+        window = STREAM_FLUSH_INTERVAL_MS / 1000
+        finished = False
+        while not finished:
+            event = await events.get()
+            if event is None:
+                break
+            batch = [event]
+            flush_at = loop.time() + window
+            while len(batch) < STREAM_MAX_EVENTS_PER_FRAME:
+                timeout = flush_at - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is None:
+                    finished = True
+                    break
+                batch.append(event)
+            yield _sse_frame({"type": "progress", "events": batch})
+        
+        try:
+            result = await task
+            trip_response = await _build_trip_response(orchestrator, result)
+            yield _sse_frame({"type": "result", **trip_response.model_dump(mode="json")})
+        except ValueError as e:
+            logger.error(f"Validation error: {e}")
+            yield _sse_frame({
+                "type": "error", **_VALIDATION_ERROR, "message": str(e), "session_id": session_id
+            })
+        except Exception as e:
+            logger.error(f"Error processing stream request: {e}", exc_info=True)
+            yield _sse_frame({
+                "type": "error", **_SERVER_ERROR, "message": _SERVER_ERROR_MESSAGE + str(e), "session_id": session_id
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/session/{session_id}")
-async def get_session(session_id: str, 
-                     session_manager: SessionManager = Depends(get_session_manager)):
+async def get_session(session_id: str):
     """Get session data"""
-    session = session_manager.get_session(session_id)
-    if not session:
+    session_manager = get_session_manager()
+    # Last 10 messages, projected by the session store
+    view = await session_manager.aget_session_view(session_id, history_limit=10)
+    if not view:
         raise HTTPException(status_code=404, detail="Session not found")
     
     return {
         "session_id": session_id,
-        "conversation_history": session["conversation_history"][-10:],  # Last 10 messages
-        "user_preferences": session["user_preferences"],
-        "current_itinerary": session["current_itinerary"],
-        "questions_asked": session["questions_asked"]
+        "conversation_history": view["conversation_history"],
+        "user_preferences": view["user_preferences"],
+        "current_itinerary": view["current_itinerary"],
+        "questions_asked": view["questions_asked"]
     }
 
 
 @router.delete("/session/{session_id}")
-async def delete_session(session_id: str,
-                        session_manager: SessionManager = Depends(get_session_manager)):
+async def delete_session(session_id: str):
     """Delete session"""
-    session = session_manager.get_session(session_id)
+    session_manager = get_session_manager()
+    session = await session_manager.aget_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     # Remove session
-    if session_id in session_manager.sessions:
-        del session_manager.sessions[session_id]
+    if session_manager.delete_session(session_id):
         logger.info(f"Deleted session: {session_id}")
     
     return {"message": "Session deleted", "session_id": session_id}
@@ -3,13 +3,22 @@ Voice API Routes
 Handles Speech-to-Text and Text-to-Speech endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List, Dict, Protocol
+import asyncio
+import base64
+import bisect
 import logging
 import io
 import os
+import re
+import threading
+import time
+import traceback
+import uuid
+import orjson
 import requests
 from dotenv import load_dotenv
 from pathlib import Path
@@ -20,7 +29,10 @@ from voice.tts_client import AssemblyAITTSClient
 from voice.elevenlabs_tts_client import ElevenLabsTTSClient
 from typing import Union
 from llm.orchestrator import LLMOrchestrator
-from api.routes.trip import get_orchestrator
+from api.routes.trip import get_orchestrator, _resolve_session
+from core.transcription_cache import get_transcription_cache
+from core.tts_cache import get_tts_cache
+from core.hashing import new_hasher
 
 # Get backend directory for .env file
 backend_dir = Path(__file__).parent.parent
@@ -30,9 +42,22 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/voice", tags=["voice"])
 
+
+class _HasApiKey(Protocol):
+    """TTS clients keep the API key they were created with"""
+    api_key: Optional[str]
+
+
 # Initialize clients (singleton pattern)
 _stt_client = None
-_tts_client = None
+_tts_client: Optional[_HasApiKey] = None
+_stt_lock = threading.Lock()
+_tts_lock = threading.Lock()
+
+# .env is re-read (to pick up new API keys) at most this often, and only if it changed
+ENV_RELOAD_INTERVAL_SECONDS = 30
+_env_mtime = 0
+_env_check_ts = float("-inf")
 
 # STT Provider selection: "elevenlabs" or "assemblyai" (default: assemblyai)
 STT_PROVIDER = os.getenv("STT_PROVIDER", "assemblyai").lower()
@@ -43,58 +68,157 @@ logger.info(f"📢 STT Provider configured: {STT_PROVIDER}")
 TTS_PROVIDER = os.getenv("TTS_PROVIDER", "elevenlabs").lower()
 logger.info(f"🔊 TTS Provider configured: {TTS_PROVIDER}")
 
+# Voice chat replies are synthesized in sentence chunks of at least this many
+# characters, several at a time, and streamed back as each chunk is ready
+TTS_CHUNK_MIN_CHARS = int(os.getenv("TTS_CHUNK_MIN_CHARS", "250"))
+TTS_MAX_PARALLEL = int(os.getenv("TTS_MAX_PARALLEL", "4"))
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+_CREDITS_RE = re.compile(r'(\d+) credits? remaining', re.IGNORECASE)
+
+
+def _split_tts_chunks(text: str, min_chars: int = TTS_CHUNK_MIN_CHARS) -> List[str]:
+    """Split text at sentence boundaries into chunks of at least min_chars"""
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        current = f"{current} {sentence}" if current else sentence
+        if len(current) >= min_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _source_id(key: str) -> str:
+    """Stable short ID for a source (the same across restarts, unlike hash())"""
+    hasher = new_hasher()
+    hasher.update(key.encode("utf-8"))
+    return f"source_{hasher.hexdigest()[:16]}"
+
+
+def _transcribe_cached(stt_client, audio_file, language: str, model: Optional[str] = None) -> Dict:
+    """Transcribe audio, reusing the result if the same audio was transcribed before"""
+    cache = get_transcription_cache()
+    cache_key = cache.generate_key(audio_file, STT_PROVIDER, language or "", model or "")
+    result = cache.get(cache_key)
+    if result is None:
+        # Identical audio uploaded concurrently is only sent to the STT provider once
+        with cache.inflight.claim(cache_key) as leader:
+            if not leader:
+                result = cache.get(cache_key)
+            if result is None:
+                result = stt_client.transcribe(audio_file, language=language, model=model)
+                # Empty transcripts are not cached, they are usually a failed upload
+                if result.get("text"):
+                    cache.set(cache_key, result)
+    return result
+
+
+def _synthesize_cached(tts_client, text: str, voice: str = "default", speed: float = 1.0,
+                       format: str = "mp3") -> bytes:
+    """Synthesize speech, reusing audio for text that was synthesized before with the same settings"""
+    cache = get_tts_cache()
+    cache_key = cache.generate_key(text, TTS_PROVIDER, getattr(tts_client, "default_model_id", ""),
+                                   voice, speed, format)
+    audio = cache.get(cache_key)
+    if audio is None:
+        # Identical text synthesized concurrently is only sent to the TTS provider once
+        with cache.inflight.claim(cache_key) as leader:
+            if not leader:
+                audio = cache.get(cache_key)
+            if audio is None:
+                audio = tts_client.synthesize(text=text, voice=voice, speed=speed, format=format)
+                cache.set(cache_key, audio)
+    return audio
+
 
 def get_stt_client() -> Optional[Union[ElevenLabsSTTClient, AssemblyAISTTClient]]:
     """Get or create STT client instance"""
     global _stt_client
     
     if _stt_client is None:
-        try:
-            if STT_PROVIDER == "assemblyai":
-                _stt_client = AssemblyAISTTClient()
-                logger.info("✅ STT Client initialized: AssemblyAI")
-            else:
-                _stt_client = ElevenLabsSTTClient()
-                logger.info("✅ STT Client initialized: ElevenLabs")
-        except ValueError as e:
-            logger.error(f"❌ STT client initialization failed: {e}")
-            _stt_client = None
+        with _stt_lock:
+            if _stt_client is None:
+                try:
+                    if STT_PROVIDER == "assemblyai":
+                        _stt_client = AssemblyAISTTClient()
+                        logger.info("✅ STT Client initialized: AssemblyAI")
+                    else:
+                        _stt_client = ElevenLabsSTTClient()
+                        logger.info("✅ STT Client initialized: ElevenLabs")
+                except ValueError as e:
+                    logger.error(f"❌ STT client initialization failed: {e}")
+                    _stt_client = None
     
     return _stt_client
 
 
+def _reload_env_if_changed() -> bool:
+    """
+    Reload .env if it was modified since it was last loaded (checked every 30s at most)
+    
+    Returns:
+        True if .env was reloaded
+    """
+    global _env_mtime, _env_check_ts
+    now = time.monotonic()
+    if now - _env_check_ts < ENV_RELOAD_INTERVAL_SECONDS:
+        return False
+    _env_check_ts = now
+    try:
+        mtime = env_path.stat().st_mtime_ns
+    except OSError:
+        return False
+    if mtime == _env_mtime:
+        return False
+    load_dotenv(dotenv_path=env_path, override=True)
+    _env_mtime = mtime
+    return True
+
+
 def get_tts_client():
     """Get or create TTS client instance"""
     global _tts_client
     
     # Reload .env file to pick up any changes (e.g., new API keys)
     # This allows picking up new API keys without full server restart
-    load_dotenv(dotenv_path=env_path, override=True)
+    # The API key only needs comparing when .env actually changed
+    env_changed = _reload_env_if_changed()
+    if _tts_client is not None and not env_changed:
+        return _tts_client
     current_api_key = os.getenv("ELEVENLABS_API_KEY")
     
-    if _tts_client is None:
-        try:
-            if TTS_PROVIDER == "elevenlabs":
-                _tts_client = ElevenLabsTTSClient()
-                logger.info(f"✅ ElevenLabs TTS client initialized (API key starts with: {current_api_key[:15] if current_api_key else 'None'}...)")
-            else:
-                _tts_client = AssemblyAITTSClient()
-                logger.warning("Using AssemblyAI for TTS (Note: AssemblyAI may not support TTS)")
-        except ValueError as e:
-            logger.warning(f"TTS client not available: {e}")
-            _tts_client = None
-    elif TTS_PROVIDER == "elevenlabs" and hasattr(_tts_client, 'api_key'):
-        # Check if API key has changed and re-initialize if needed
-        if current_api_key and _tts_client.api_key != current_api_key:
-            logger.info(f"🔄 ELEVENLABS_API_KEY changed detected!")
-            logger.info(f"   Old key starts with: {_tts_client.api_key[:15]}...")
-            logger.info(f"   New key starts with: {current_api_key[:15]}...")
-            logger.info("   Re-initializing TTS client...")
-            try:
-                _tts_client = ElevenLabsTTSClient()
-                logger.info("✅ TTS client re-initialized with new API key")
-            except ValueError as e:
-                logger.warning(f"Failed to re-initialize TTS client: {e}")
+    # Only take the lock when the client has to be (re)created
+    key_changed = (TTS_PROVIDER == "elevenlabs" and current_api_key
+                   and _tts_client is not None and _tts_client.api_key != current_api_key)
+    if _tts_client is None or key_changed:
+        with _tts_lock:
+            if _tts_client is None:
+                try:
+                    if TTS_PROVIDER == "elevenlabs":
+                        _tts_client = ElevenLabsTTSClient()
+                        logger.info(f"✅ ElevenLabs TTS client initialized (API key starts with: {current_api_key[:15] if current_api_key else 'None'}...)")
+                    else:
+                        _tts_client = AssemblyAITTSClient()
+                        logger.warning("Using AssemblyAI for TTS (Note: AssemblyAI may not support TTS)")
+                except ValueError as e:
+                    logger.warning(f"TTS client not available: {e}")
+                    _tts_client = None
+            elif TTS_PROVIDER == "elevenlabs":
+                # Check if API key has changed and re-initialize if needed
+                if current_api_key and _tts_client.api_key != current_api_key:
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(f"🔄 ELEVENLABS_API_KEY changed detected!")
+                        logger.info(f"   Old key starts with: {(_tts_client.api_key or '')[:15]}...")
+                        logger.info(f"   New key starts with: {current_api_key[:15]}...")
+                        logger.info("   Re-initializing TTS client...")
+                    try:
+                        _tts_client = ElevenLabsTTSClient()
+                        logger.info("✅ TTS client re-initialized with new API key")
+                    except ValueError as e:
+                        logger.warning(f"Failed to re-initialize TTS client: {e}")
     
     return _tts_client
 
@@ -149,16 +273,15 @@ async def transcribe_audio(
         )
     
     try:
-        # Read audio file
-        audio_data = await audio.read()
-        
-        if not audio_data:
+        # The upload is already spooled to a temp file, pass that on instead of
+        # reading it all into memory
+        if not audio.size:
             raise HTTPException(status_code=400, detail="Audio file is empty")
         
-        logger.info(f"Transcribing audio file: {audio.filename} (size: {len(audio_data)} bytes)")
+        logger.info(f"Transcribing audio file: {audio.filename} (size: {audio.size} bytes)")
         
-        # Transcribe
-        result = stt_client.transcribe(audio_data, language=language, model=model)
+        # Transcribe (blocking HTTP calls, run off the event loop)
+        result = await asyncio.to_thread(_transcribe_cached, stt_client, audio.file, language, model)
         
         return TranscribeResponse(
             text=result["text"],
@@ -194,8 +317,10 @@ async def synthesize_speech(
     try:
         logger.info(f"Synthesizing speech for text: {request.text[:100]}...")
         
-        # Synthesize speech
-        audio_data = tts_client.synthesize(
+        # Synthesize speech (blocking HTTP call, run off the event loop)
+        audio_data = await asyncio.to_thread(
+            _synthesize_cached,
+            tts_client,
             text=request.text,
             voice=request.voice,
             speed=request.speed,
@@ -261,7 +386,6 @@ async def voice_health_check():
     
     # Check Orchestrator
     try:
-        from api.routes.trip import get_orchestrator
         orchestrator = get_orchestrator()
         health_status["services"]["orchestrator"] = {
             "available": orchestrator is not None,
@@ -284,6 +408,7 @@ async def voice_chat(
     language: str = Form(default="en", description="Language code for STT"),
     voice: str = Form(default="default", description="Voice ID for TTS"),
     speed: float = Form(default=1.0, description="Speech speed for TTS"),
+    legacy_headers: bool = Query(default=False, description="Return text and sources in base64 X-* headers instead of a multipart body"),
     stt_client = Depends(get_stt_client),
     tts_client = Depends(get_tts_client),
     orchestrator: LLMOrchestrator = Depends(get_orchestrator)
@@ -320,12 +445,15 @@ async def voice_chat(
     try:
         # Step 1: Transcribe audio to text
         logger.info(f"Step 1: Transcribing audio (session: {session_id})")
-        audio_data = await audio.read()
-        
-        if not audio_data:
+        # Pass on the spooled upload instead of reading it all into memory
+        if not audio.size:
             raise HTTPException(status_code=400, detail="Audio file is empty")
         
-        transcription_result = stt_client.transcribe(audio_data, language=language)
+        # The session lookup doesn't need the transcript, so it runs alongside STT
+        transcription_result, session_id = await asyncio.gather(
+            asyncio.to_thread(_transcribe_cached, stt_client, audio.file, language),
+            _resolve_session(orchestrator, session_id)
+        )
         user_text = transcription_result["text"]
         
         logger.info(f"Transcribed text: {user_text}")
@@ -339,18 +467,9 @@ async def voice_chat(
         # Step 2: Process with backend (trip planning orchestrator)
         logger.info(f"Step 2: Processing with backend (session: {session_id})")
         
-        # Get or create session
-        if not session_id:
-            session_id = orchestrator.session_manager.create_session()
-            logger.info(f"Created new session: {session_id}")
-        else:
-            session = orchestrator.session_manager.get_session(session_id)
-            if not session:
-                session_id = orchestrator.session_manager.create_session()
-                logger.info(f"Session expired, created new: {session_id}")
-        
         # Process user request
-        backend_result = orchestrator.process_user_request(
+        backend_result = await asyncio.to_thread(
+            orchestrator.process_user_request,
             user_message=user_text,
             session_id=session_id
         )
@@ -383,154 +502,202 @@ async def voice_chat(
                 ai_text = truncated + "... [Response truncated]"
             logger.info(f"Truncated response to {len(ai_text)} characters")
         
+        # Synthesize sentence chunks in parallel. The first chunk is awaited here so
+        # quota errors still fall back to a shortened reply below
+        semaphore = asyncio.Semaphore(TTS_MAX_PARALLEL)
+        
+        async def synthesize_chunk(chunk: str) -> bytes:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    _synthesize_cached,
+                    tts_client,
+                    text=chunk,
+                    voice=voice,
+                    speed=speed,
+                    format="mp3"
+                )
+        
+        chunk_tasks = [asyncio.create_task(synthesize_chunk(chunk)) for chunk in _split_tts_chunks(ai_text)]
+        # Cancel the remaining chunks if anything fails before the response is handed off
         try:
-            audio_response = tts_client.synthesize(
-                text=ai_text,
-                voice=voice,
-                speed=speed,
-                format="mp3"
-            )
-        except requests.exceptions.RequestException as tts_error:
-            error_msg = str(tts_error)
-            # If quota error, try with progressively shorter text
-            if "quota" in error_msg.lower() or "credits" in error_msg.lower():
-                logger.warning("Quota error detected, trying with progressively shorter responses...")
-                
-                # Extract remaining credits from error if possible
-                import re
-                remaining_credits = None
-                credit_match = re.search(r'(\d+) credits? remaining', error_msg, re.IGNORECASE)
-                if credit_match:
-                    remaining_credits = int(credit_match.group(1))
-                    # Use 80% of remaining credits to be safe
-                    max_chars = int(remaining_credits * 0.8) if remaining_credits else 200
-                else:
-                    max_chars = 200  # Very conservative fallback
-                
-                # Try progressively shorter texts
-                retry_lengths = [max_chars, 150, 100, 50]
-                
-                for retry_len in retry_lengths:
-                    if retry_len >= len(ai_text):
-                        continue  # Skip if already shorter
+            try:
+                audio_chunks = [await chunk_tasks[0]]
+            except requests.exceptions.RequestException as tts_error:
+                for task in chunk_tasks[1:]:
+                    task.cancel()
+                chunk_tasks = []
+                error_msg = str(tts_error)
+                # If quota error, try with progressively shorter text
+                if "quota" in error_msg.lower() or "credits" in error_msg.lower():
+                    logger.warning("Quota error detected, trying with progressively shorter responses...")
                     
-                    short_text = ai_text[:retry_len]
-                    # Try to end at a sentence
-                    last_period = short_text.rfind('.')
-                    if last_period > retry_len * 0.7:
-                        short_text = short_text[:last_period + 1]
+                    # Extract remaining credits from error if possible
+                    remaining_credits = None
+                    credit_match = _CREDITS_RE.search(error_msg)
+                    if credit_match:
+                        remaining_credits = int(credit_match.group(1))
+                        # Use 80% of remaining credits to be safe
+                        max_chars = int(remaining_credits * 0.8) if remaining_credits else 200
+                    else:
+                        max_chars = 200  # Very conservative fallback
                     
-                    short_text += "\n\n[Response shortened due to credit limit]"
-                    logger.info(f"Retrying with {len(short_text)} characters (target: {retry_len})")
+                    # Try progressively shorter texts
+                    retry_lengths = [max_chars, 150, 100, 50]
+                    # Offsets of every period, so each retry finds its cut point by bisection
+                    period_ends = [i for i, ch in enumerate(ai_text) if ch == '.']
                     
-                    try:
-                        audio_response = tts_client.synthesize(
-                            text=short_text,
-                            voice=voice,
-                            speed=speed,
-                            format="mp3"
+                    for retry_len in retry_lengths:
+                        if retry_len >= len(ai_text):
+                            continue  # Skip if already shorter
+                        
+                        short_text = ai_text[:retry_len]
+                        # Try to end at a sentence
+                        idx = bisect.bisect_left(period_ends, retry_len) - 1
+                        last_period = period_ends[idx] if idx >= 0 else -1
+                        if last_period > retry_len * 0.7:
+                            short_text = short_text[:last_period + 1]
+                        
+                        short_text += "\n\n[Response shortened due to credit limit]"
+                        logger.info(f"Retrying with {len(short_text)} characters (target: {retry_len})")
+                        
+                        try:
+                            audio_chunks = [await asyncio.to_thread(
+                                _synthesize_cached,
+                                tts_client,
+                                text=short_text,
+                                voice=voice,
+                                speed=speed,
+                                format="mp3"
+                            )]
+                            logger.info(f"Successfully generated audio with {len(short_text)} characters")
+                            ai_text = short_text  # Update ai_text for response
+                            break
+                        except requests.exceptions.RequestException as retry_error:
+                            retry_error_msg = str(retry_error)
+                            if "quota" not in retry_error_msg.lower() and "credits" not in retry_error_msg.lower():
+                                # Different error, re-raise
+                                raise
+                            # Still quota error, try next shorter length
+                            logger.warning(f"Still quota error with {len(short_text)} chars, trying shorter...")
+                            continue
+                    else:
+                        # All retries failed
+                        logger.error(f"Failed even with shortest text. Remaining credits: {remaining_credits}")
+                        raise HTTPException(
+                            status_code=402,
+                            detail=f"Quota exceeded. Your account has insufficient credits remaining. "
+                                   f"Remaining: {remaining_credits or 'unknown'} credits. "
+                                   f"Please upgrade your ElevenLabs subscription or wait for quota reset. "
+                                   f"Error: {error_msg}"
                         )
-                        logger.info(f"Successfully generated audio with {len(short_text)} characters")
-                        ai_text = short_text  # Update ai_text for response
-                        break
-                    except requests.exceptions.RequestException as retry_error:
-                        retry_error_msg = str(retry_error)
-                        if "quota" not in retry_error_msg.lower() and "credits" not in retry_error_msg.lower():
-                            # Different error, re-raise
-                            raise
-                        # Still quota error, try next shorter length
-                        logger.warning(f"Still quota error with {len(short_text)} chars, trying shorter...")
-                        continue
                 else:
-                    # All retries failed
-                    logger.error(f"Failed even with shortest text. Remaining credits: {remaining_credits}")
-                    raise HTTPException(
-                        status_code=402,
-                        detail=f"Quota exceeded. Your account has insufficient credits remaining. "
-                               f"Remaining: {remaining_credits or 'unknown'} credits. "
-                               f"Please upgrade your ElevenLabs subscription or wait for quota reset. "
-                               f"Error: {error_msg}"
-                    )
-            else:
-                raise
-        
-        logger.info(f"Voice chat complete (session: {session_id})")
-        
-        # Get sources from session
-        session = orchestrator.session_manager.get_session(session_id)
-        raw_sources = session.get("sources", []) if session else []
-        
-        logger.info(f"🔍 Checking sources in session {session_id}: {len(raw_sources)} raw sources found")
-        if raw_sources:
-            logger.info(f"   First source structure: {raw_sources[0] if raw_sources else 'None'}")
-        
-        # Transform citations to frontend format: {id, name, type, url}
-        # Backend format: {source, url, section, section_anchor}
-        sources = []
-        seen_urls = set()
-        
-        for idx, citation in enumerate(raw_sources):
-            url = citation.get("url", "")
-            source_name = citation.get("source", "Unknown Source")
+                    raise
             
-            # Skip duplicates by URL
-            if url and url in seen_urls:
-                continue
-            if url:
-                seen_urls.add(url)
+            logger.info(f"Voice chat complete (session: {session_id})")
             
-            # Transform to frontend format
-            transformed_source = {
-                "id": f"source_{idx}_{hash(url) if url else hash(source_name)}",
-                "name": source_name,
-                "type": citation.get("section", "General"),
-                "url": url
-            }
-            sources.append(transformed_source)
-        
-        sources = sources[:10]  # Limit to 10 sources
-        logger.info(f"✅ Transformed {len(sources)} sources for frontend (from {len(raw_sources)} raw citations)")
-        
-        # Return audio response
-        # Note: Custom headers with text content must be encoded to avoid invalid characters
-        # HTTP headers can only contain ASCII characters, so we encode text values
-        import base64
-        import json
-        
-        # Encode text headers to base64 to avoid invalid characters (newlines, unicode, etc.)
-        encoded_user_text = base64.b64encode(user_text.encode('utf-8')).decode('ascii')
-        encoded_ai_text = base64.b64encode(ai_text.encode('utf-8')).decode('ascii')
-        
-        # Encode sources as JSON and then base64
-        encoded_sources = ""
-        if sources:
-            sources_json = json.dumps(sources)
-            encoded_sources = base64.b64encode(sources_json.encode('utf-8')).decode('ascii')
-            logger.info(f"📤 Sending {len(sources)} sources in X-Sources header (encoded length: {len(encoded_sources)})")
-            logger.debug(f"   First source: {sources[0] if sources else 'None'}")
-        else:
-            logger.warning("⚠️  No sources to send in response")
-        
-        headers = {
-            "Content-Disposition": 'attachment; filename="response.mp3"',
-            "X-Session-Id": session_id or "",
-            "X-Transcribed-Text": encoded_user_text,
-            "X-AI-Response": encoded_ai_text,
-            "X-Encoding": "base64"  # Indicate that custom headers are base64 encoded
-        }
-        
-        # Add sources header if available
-        if encoded_sources:
-            headers["X-Sources"] = encoded_sources
-            logger.info(f"✅ Added X-Sources header to response")
-        else:
-            logger.warning("⚠️  X-Sources header NOT added (no sources or encoding failed)")
-        
-        return Response(
-            content=audio_response,
-            media_type="audio/mpeg",
-            headers=headers
-        )
+            # Get sources from session (only the sources - not the whole history)
+            raw_sources = await orchestrator.session_manager.aget_session_sources(session_id) or []
+            
+            logger.info(f"🔍 Checking sources in session {session_id}: {len(raw_sources)} raw sources found")
+            if raw_sources:
+                logger.info(f"   First source structure: {raw_sources[0] if raw_sources else 'None'}")
+            
+            # Transform citations to frontend format: {id, name, type, url}
+            # Backend format: {source, url, section, section_anchor}
+            # Skip duplicates by URL (by name for citations without one)
+            unique_citations = {}
+            for citation in raw_sources:
+                unique_citations.setdefault(citation.get("url") or citation.get("source", "Unknown Source"), citation)
+            
+            sources = [
+                {
+                    "id": _source_id(key),
+                    "name": citation.get("source", "Unknown Source"),
+                    "type": citation.get("section", "General"),
+                    "url": citation.get("url", "")
+                }
+                for key, citation in list(unique_citations.items())[:10]  # Limit to 10 sources
+            ]
+            logger.info(f"✅ Transformed {len(sources)} sources for frontend (from {len(raw_sources)} raw citations)")
+            
+            async def audio_stream():
+                try:
+                    for audio_chunk in audio_chunks:
+                        yield audio_chunk
+                    for task in chunk_tasks[1:]:
+                        yield await task
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"Speech synthesis failed mid-response, audio is truncated: {e}")
+                finally:
+                    for task in chunk_tasks:
+                        task.cancel()
+            
+            if legacy_headers:
+                # Return audio response with the text in headers
+                # Note: Custom headers with text content must be encoded to avoid invalid characters
+                # HTTP headers can only contain ASCII characters, so we encode text values
+                
+                # Encode text headers to base64 to avoid invalid characters (newlines, unicode, etc.)
+                encoded_user_text = base64.b64encode(user_text.encode('utf-8')).decode('ascii')
+                encoded_ai_text = base64.b64encode(ai_text.encode('utf-8')).decode('ascii')
+                
+                # Encode sources as JSON and then base64
+                encoded_sources = ""
+                if sources:
+                    encoded_sources = base64.b64encode(orjson.dumps(sources)).decode('ascii')
+                    logger.info(f"📤 Sending {len(sources)} sources in X-Sources header (encoded length: {len(encoded_sources)})")
+                    logger.debug(f"   First source: {sources[0] if sources else 'None'}")
+                else:
+                    logger.warning("⚠️  No sources to send in response")
+                
+                headers = {
+                    "Content-Disposition": 'attachment; filename="response.mp3"',
+                    "X-Session-Id": session_id or "",
+                    "X-Transcribed-Text": encoded_user_text,
+                    "X-AI-Response": encoded_ai_text,
+                    "X-Encoding": "base64"  # Indicate that custom headers are base64 encoded
+                }
+                
+                # Add sources header if available
+                if encoded_sources:
+                    headers["X-Sources"] = encoded_sources
+                    logger.info(f"✅ Added X-Sources header to response")
+                else:
+                    logger.warning("⚠️  X-Sources header NOT added (no sources or encoding failed)")
+                
+                return StreamingResponse(
+                    audio_stream(),
+                    media_type="audio/mpeg",
+                    headers=headers
+                )
+            
+            # Return a multipart body: a JSON part with the text and sources, then the
+            # raw MP3 part - no base64 expansion and no header size limits
+            boundary = uuid.uuid4().hex
+            metadata = orjson.dumps({
+                "session_id": session_id,
+                "transcribed_text": user_text,
+                "ai_response": ai_text,
+                "sources": sources
+            })
+            
+            async def multipart_stream():
+                yield (f"--{boundary}\r\nContent-Type: application/json; charset=utf-8\r\n\r\n".encode("ascii")
+                       + metadata
+                       + f"\r\n--{boundary}\r\nContent-Type: audio/mpeg\r\n\r\n".encode("ascii"))
+                async for audio_chunk in audio_stream():
+                    yield audio_chunk
+                yield f"\r\n--{boundary}--\r\n".encode("ascii")
+            
+            return StreamingResponse(
+                multipart_stream(),
+                media_type=f"multipart/mixed; boundary={boundary}",
+                headers={"X-Session-Id": session_id}
+            )
+        except BaseException:
+            for task in chunk_tasks:
+                task.cancel()
+            raise
     
     except HTTPException:
         raise
@@ -538,7 +705,6 @@ async def voice_chat(
         logger.error(f"ValueError in voice chat: {e}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        import traceback
         error_traceback = traceback.format_exc()
         logger.error(f"Voice chat error: {e}", exc_info=True)
         logger.error(f"Full traceback:\n{error_traceback}")
@@ -0,0 +1,19 @@
+"""
+Content hashing for cache keys
+"""
+
+import hashlib
+
+# blake3 is optional (SIMD-accelerated), hashlib's blake2b is the fallback
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+
+def new_hasher():
+    """Create a hasher for cache keys (128-bit hex digests with the fallback)"""
+    if BLAKE3_AVAILABLE:
+        return blake3.blake3()
+    return hashlib.blake2b(digest_size=16)
@@ -0,0 +1,41 @@
+"""
+Shared HTTP session for outbound API calls
+"""
+
+from typing import Optional
+import os
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_http_session: Optional[requests.Session] = None
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get global HTTP session
+    
+    Keep-alive connections are pooled per host and reused across chat requests,
+    so only the first call to an API pays the TCP + TLS handshake.
+    """
+    global _http_session
+    if _http_session is None:
+        pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", "100"))
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_session = session
+        logger.info(f"HTTP session initialized (pool_maxsize: {pool_maxsize})")
+    return _http_session
+
+
+def close_http_session():
+    """Close global HTTP session and its pooled connections"""
+    global _http_session
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
+        logger.info("HTTP session closed")
@@ -0,0 +1,120 @@
+"""
+Keyed caching in Redis when available, otherwise in an in-process LRU
+"""
+
+from typing import Any, Optional
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+from core.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedCache:
+    """
+    Cache values under keys computed by the caller
+    
+    Values are kept in Redis under {KEY_PREFIX}{key} (shared by all workers and
+    replicas) when a Redis client is given, otherwise in an in-process LRU.
+    Redis errors are logged and treated as a miss.
+    
+    Subclasses set KEY_PREFIX and NAME, and override _encode/_decode when the
+    values are not raw bytes.
+    """
+    
+    KEY_PREFIX = ""
+    NAME = "Cache"
+    
+    def __init__(self, redis_client=None, ttl_days: int = 7, max_size: int = 200):
+        """
+        Initialize cache
+        
+        Args:
+            redis_client: Optional Redis client to store values in
+            ttl_days: Time-to-live for cache entries in days
+            max_size: Maximum number of in-process entries (without Redis)
+        """
+        self.redis = redis_client
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self.max_size = max_size
+        # key -> (value, expires at), least recently used first
+        self.cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        # Concurrent misses for the same key wait for a single provider call
+        self.inflight = SingleFlight()
+        backend = "redis" if redis_client is not None else "memory"
+        logger.info(f"{self.NAME} initialized (backend: {backend}, TTL: {ttl_days} days)")
+    
+    def _encode(self, value: Any):
+        """Value as stored in Redis"""
+        return value
+    
+    def _decode(self, raw: bytes) -> Any:
+        """Value as read back from Redis"""
+        return raw
+    
+    def _cacheable(self, value: Any) -> bool:
+        """Whether a value should be cached at all"""
+        return True
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get cached value if available"""
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(f"{self.KEY_PREFIX}{key}")
+            except Exception as e:
+                logger.warning(f"{self.NAME} read failed: {e}")
+                return None
+            value = self._decode(raw) if raw is not None else None
+        else:
+            with self.lock:
+                entry = self.cache.get(key)
+                if entry is None:
+                    return None
+                value, expires_at = entry
+                if time.monotonic() > expires_at:
+                    del self.cache[key]
+                    return None
+                self.cache.move_to_end(key)
+        
+        if value is not None:
+            logger.debug("%s hit: %.8s", self.NAME, key)
+        return value
+    
+    def set(self, key: str, value: Any):
+        """Cache a value"""
+        if not self._cacheable(value):
+            return
+        
+        if self.redis is not None:
+            try:
+                self.redis.set(f"{self.KEY_PREFIX}{key}", self._encode(value), ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"{self.NAME} write failed: {e}")
+            return
+        
+        with self.lock:
+            self.cache.pop(key, None)
+            while len(self.cache) >= self.max_size:
+                self.cache.popitem(last=False)
+            self.cache[key] = (value, time.monotonic() + self.ttl_seconds)
+
+
+def select_redis_client(backend_var: str, name: str):
+    """
+    Redis client for a cache configured by backend_var, or None for an in-process cache
+    
+    Redis is used when backend_var is redis (the default when REDIS_URL is set).
+    """
+    backend = (os.getenv(backend_var) or ("redis" if os.getenv("REDIS_URL") else "memory")).lower()
+    if backend != "redis":
+        return None
+    
+    from core.redis_client import get_redis_client
+    redis_client = get_redis_client()
+    if redis_client is None:
+        logger.warning(f"{backend_var} is redis but Redis is not available, using in-memory {name}")
+    return redis_client
@@ -0,0 +1,46 @@
+"""
+Shared Redis connection (optional - only used when REDIS_URL is set)
+"""
+
+from typing import Optional
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Redis is optional, everything falls back to in-process storage without it
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+_redis_client = None
+
+
+def get_redis_client() -> Optional["redis.Redis"]:
+    """
+    Get global Redis client
+    
+    Returns:
+        Client for REDIS_URL (connection pooled, thread-safe), or None if
+        REDIS_URL is not set or the redis package is not installed
+    """
+    global _redis_client
+    if _redis_client is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return None
+        if not REDIS_AVAILABLE:
+            logger.warning("REDIS_URL is set but redis is not installed. Install with: pip install redis")
+            return None
+        max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        _redis_client = redis.Redis.from_url(
+            redis_url,
+            max_connections=max_connections,
+            health_check_interval=30
+        )
+        logger.info(f"Redis client initialized (max_connections: {max_connections})")
+    return _redis_client
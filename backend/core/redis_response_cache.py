@@ -0,0 +1,63 @@
+"""
+Redis-backed LLM response cache, shared by all workers and replicas
+"""
+
+from typing import Dict, Optional
+import json
+import logging
+import time
+import redis
+from core.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Cache LLM responses in Redis
+    
+    Responses are stored as JSON under llm:resp:v2:{key} with the cache TTL, so
+    Redis takes care of expiry and eviction. A small in-process cache sits in front
+    for the hottest keys. Redis errors are logged and treated as a miss - the cache
+    must never fail a request.
+    """
+    
+    KEY_PREFIX = "llm:resp:v2:"
+    
+    def __init__(self, redis_client, ttl_minutes: int = 60, l1_size: int = 128, **kwargs):
+        super().__init__(ttl_minutes=ttl_minutes, max_size=l1_size, **kwargs)
+        self.redis = redis_client
+        self.ttl_seconds = int(self.ttl.total_seconds())
+        logger.info(f"Redis response cache initialized (TTL: {ttl_minutes} min, L1 size: {l1_size})")
+    
+    def _get_entry(self, key: str) -> Optional[Dict]:
+        """Look up a cached response, in-process first and then in Redis"""
+        response = super()._get_entry(key)
+        if response is not None:
+            return response
+        
+        name = f"{self.KEY_PREFIX}{key}"
+        try:
+            # The remaining TTL comes back in the same round trip
+            raw, ttl_ms = self.redis.pipeline().get(name).pttl(name).execute()
+        except redis.RedisError as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        
+        response = json.loads(raw)
+        # Promote into the in-process cache, expiring when the Redis entry does
+        expires_at = time.monotonic() + ttl_ms / 1000 if ttl_ms > 0 else None
+        super()._set_entry(key, response, expires_at)
+        logger.info(f"✅ Cache hit (redis): {key[:8]}")
+        return response
+    
+    def _set_entry(self, key: str, response: Dict, expires_at: Optional[float] = None):
+        """Store a response in Redis and the in-process cache"""
+        super()._set_entry(key, response, expires_at)
+        try:
+            self.redis.set(f"{self.KEY_PREFIX}{key}", json.dumps(response), ex=self.ttl_seconds)
+        except redis.RedisError as e:
+            logger.warning(f"Response cache write failed: {e}")
+
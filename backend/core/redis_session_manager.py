@@ -0,0 +1,219 @@
+"""
+Redis-backed session management, shared by all workers and replicas
+"""
+
+from typing import Dict, Optional, List
+import asyncio
+import time
+import json
+from datetime import datetime
+import logging
+from core.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+
+class RedisSessionManager(SessionManager):
+    """
+    Manages user sessions in Redis
+    
+    Layout per session:
+    - sess:{id}          hash, one JSON-encoded field per session key
+    - sess:{id}:history  list of JSON-encoded conversation messages
+    
+    Both keys expire after the session timeout and the TTL is refreshed on every
+    access, so Redis takes care of expiry and no sweep is needed.
+    
+    Sessions returned by get_session are snapshots - changes must be written back
+    with update_session (or add_message / increment_questions).
+    """
+    
+    KEY_PREFIX = "sess:"
+    DATETIME_FIELDS = ("created_at",)
+    
+    def __init__(self, redis_client, session_timeout_minutes: int = 30, max_history: int = 200):
+        self.redis = redis_client
+        self.ttl_seconds = session_timeout_minutes * 60
+        self.max_history = max_history
+        logger.info(f"Redis session manager initialized (timeout: {session_timeout_minutes} minutes)")
+    
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+    
+    def _history_key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}:history"
+    
+    def _encode_fields(self, data: Dict) -> Dict[str, str]:
+        """Encode session fields for the hash (history is stored separately)"""
+        fields = {}
+        for field, value in data.items():
+            if field == "conversation_history":
+                continue
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            fields[field] = json.dumps(value)
+        return fields
+    
+    def _decode_fields(self, raw: Dict[bytes, bytes]) -> Dict:
+        """Decode a session hash back into a session dict"""
+        session = {field.decode(): json.loads(value) for field, value in raw.items()}
+        for field in self.DATETIME_FIELDS:
+            if isinstance(session.get(field), str):
+                session[field] = datetime.fromisoformat(session[field])
+        return session
+    
+    def create_session(self) -> str:
+        """Create a new session"""
+        session = self._new_session()
+        fields = self._encode_fields(session)
+        
+        # Claim the ID atomically so two workers can never end up sharing one
+        while True:
+            session_id = self._new_session_id()
+            key = self._key(session_id)
+            if self.redis.hsetnx(key, "created_at", fields["created_at"]):
+                break
+        
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+        logger.info(f"Created new session: {session_id}")
+        return session_id
+    
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        """Get session data"""
+        history_key = self._history_key(session_id)
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self._key(session_id))
+        pipe.lrange(history_key, 0, -1)
+        pipe.expire(self._key(session_id), self.ttl_seconds)
+        pipe.expire(history_key, self.ttl_seconds)
+        raw, history, _, _ = pipe.execute()
+        if not raw:
+            return None
+        
+        session = self._decode_fields(raw)
+        session["conversation_history"] = [json.loads(message) for message in history]
+        session["last_accessed"] = time.monotonic()
+        return session
+    
+    async def acreate_session(self) -> str:
+        """Create a new session without blocking the event loop"""
+        return await asyncio.to_thread(self.create_session)
+    
+    async def aget_session(self, session_id: str) -> Optional[Dict]:
+        """Get session data without blocking the event loop"""
+        return await asyncio.to_thread(self.get_session, session_id)
+    
+    VIEW_FIELDS = ("user_preferences", "current_itinerary", "questions_asked")
+    
+    def get_session_view(self, session_id: str, history_limit: int = 10) -> Optional[Dict]:
+        """Get the client-facing projection of a session, reading only the fields it needs"""
+        key = self._key(session_id)
+        history_key = self._history_key(session_id)
+        pipe = self.redis.pipeline()
+        pipe.hmget(key, self.VIEW_FIELDS)
+        pipe.lrange(history_key, -history_limit, -1)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.expire(history_key, self.ttl_seconds)
+        values, history, exists, _ = pipe.execute()
+        if not exists:
+            return None
+        
+        view = {field: json.loads(value) if value is not None else None
+                for field, value in zip(self.VIEW_FIELDS, values)}
+        view["conversation_history"] = [json.loads(message) for message in history]
+        return view
+    
+    async def aget_session_view(self, session_id: str, history_limit: int = 10) -> Optional[Dict]:
+        """Get the client-facing projection of a session without blocking the event loop"""
+        return await asyncio.to_thread(self.get_session_view, session_id, history_limit)
+    
+    def get_session_sources(self, session_id: str) -> Optional[List[Dict]]:
+        """Get the sources collected in a session, without reading the rest of it"""
+        key = self._key(session_id)
+        pipe = self.redis.pipeline()
+        pipe.hget(key, "sources")
+        pipe.expire(key, self.ttl_seconds)
+        pipe.expire(self._history_key(session_id), self.ttl_seconds)
+        value, exists, _ = pipe.execute()
+        if not exists:
+            return None
+        return (json.loads(value) if value is not None else None) or []
+    
+    async def aget_session_sources(self, session_id: str) -> Optional[List[Dict]]:
+        """Get the sources collected in a session without blocking the event loop"""
+        return await asyncio.to_thread(self.get_session_sources, session_id)
+    
+    def touch(self, session_id: str) -> bool:
+        """Refresh session expiry"""
+        pipe = self.redis.pipeline()
+        pipe.expire(self._key(session_id), self.ttl_seconds)
+        pipe.expire(self._history_key(session_id), self.ttl_seconds)
+        exists, _ = pipe.execute()
+        return bool(exists)
+    
+    def delete_session(self, session_id: str) -> bool:
+        """Delete session, returns False if it did not exist"""
+        return self.redis.delete(self._key(session_id), self._history_key(session_id)) > 0
+    
+    def update_session(self, session_id: str, updates: Dict):
+        """Update session data"""
+        # Refresh first - HSET on an expired session would recreate it without a TTL
+        if not self.touch(session_id):
+            return
+        
+        fields = self._encode_fields(updates)
+        if fields:
+            self.redis.hset(self._key(session_id), mapping=fields)
+    
+    def add_message(self, session_id: str, role: str, content: str):
+        """Add message to conversation history"""
+        if not self.redis.expire(self._key(session_id), self.ttl_seconds):
+            return
+        
+        history_key = self._history_key(session_id)
+        pipe = self.redis.pipeline()
+        pipe.rpush(history_key, json.dumps({
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(timespec="seconds")
+        }))
+        # Keep only the newest max_history messages
+        pipe.ltrim(history_key, -self.max_history, -1)
+        pipe.expire(history_key, self.ttl_seconds)
+        pipe.execute()
+    
+    def get_conversation_history(self, session_id: str,
+                                 max_messages: int = 30) -> List[Dict]:
+        """Get recent conversation history"""
+        history_key = self._history_key(session_id)
+        pipe = self.redis.pipeline()
+        pipe.expire(self._key(session_id), self.ttl_seconds)
+        pipe.lrange(history_key, -max_messages, -1)
+        pipe.expire(history_key, self.ttl_seconds)
+        exists, history, _ = pipe.execute()
+        if not exists:
+            return []
+        return [json.loads(message) for message in history]
+    
+    def increment_questions(self, session_id: str):
+        """Increment question count"""
+        if self.touch(session_id):
+            self.redis.hincrby(self._key(session_id), "questions_asked", 1)
+    
+    def get_questions_asked(self, session_id: str) -> int:
+        """Get number of questions asked"""
+        value = self.redis.hget(self._key(session_id), "questions_asked")
+        return json.loads(value) if value else 0
+    
+    async def start(self):
+        """Nothing to sweep - expired sessions are removed by Redis key expiry"""
+    
+    async def stop(self):
+        """Nothing to stop"""
+    
+    def cleanup_expired_sessions(self):
+        """Expired sessions are removed by Redis key expiry"""
+        return 0
@@ -2,11 +2,15 @@
 Response caching to reduce LLM API calls
 """
 
-from typing import Dict, Optional, Tuple
-from datetime import datetime, timedelta
-import hashlib
+from typing import ContextManager, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import timedelta
 import json
 import logging
+import threading
+import time
+from core.hashing import new_hasher
+from core.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +19,40 @@ class ResponseCache:
     """
     Cache LLM responses to reduce API calls
     Uses content-based hashing for cache keys
+    
+    Safe to share between threads - entries are only touched under self.lock.
     """
     
-    def __init__(self, ttl_minutes: int = 60, max_size: int = 1000):
+    def __init__(self, ttl_minutes: int = 60, max_size: int = 1000,
+                 semantic_encoder=None, semantic_threshold: float = 0.92,
+                 coalesce_timeout: float = 15.0):
         """
         Initialize response cache
         
         Args:
             ttl_minutes: Time-to-live for cache entries in minutes
             max_size: Maximum number of cache entries
+            semantic_encoder: Optional sentence encoder - when set, a prompt that
+                misses the exact-match lookup is matched against similar cached prompts
+            semantic_threshold: Minimum cosine similarity for a semantic match
+            coalesce_timeout: Longest an identical prompt waits for the in-flight
+                one (about one LLM round trip) before calling the LLM itself
         """
-        self.cache: Dict[str, Dict] = {}
+        # Kept in last-use order (least recently used first) so eviction is O(1)
+        self.cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.lock = threading.RLock()
         self.ttl = timedelta(minutes=ttl_minutes)
+        # key -> monotonic expiry time; the TTL is fixed, so insertion order is expiry
+        # order (copies from a shared store may expire sooner - they are still
+        # checked on every lookup)
+        self.expiry: "OrderedDict[str, float]" = OrderedDict()
         self.max_size = max_size
+        self.semantic_encoder = semantic_encoder
+        self.semantic_threshold = semantic_threshold
+        # One embedding index per system prompt / tools combination
+        self.semantic_indexes: Dict[str, "SemanticIndex"] = {}
+        # Identical prompts that miss at the same time only call the LLM once
+        self.inflight = SingleFlight(timeout=coalesce_timeout)
         logger.info(f"Response cache initialized (TTL: {ttl_minutes} min, Max size: {max_size})")
     
     def _generate_key(self, messages: list, tools_hash: Optional[str] = None) -> str:
@@ -41,29 +66,46 @@ class ResponseCache:
         Returns:
             Cache key string
         """
-        # Extract relevant parts for hashing
-        # Only use last few messages and system prompt for key generation
-        key_parts = []
+        system_prompt, user_message = self._split_messages(messages)
         
-        # System prompt
+        # Feed the parts straight into the hasher
+        hasher = new_hasher()
+        if system_prompt is not None:
+            hasher.update(b"system:")
+            hasher.update(system_prompt[:100].encode("utf-8", "ignore"))
+        if user_message is not None:
+            # Last user message (most important for cache hit)
+            hasher.update(b"|user:")
+            hasher.update(user_message.encode("utf-8", "ignore"))
+        if tools_hash:
+            hasher.update(b"|tools:")
+            hasher.update(tools_hash.encode("utf-8", "ignore"))
+        return hasher.hexdigest()
+    
+    def _split_messages(self, messages: list) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Extract the parts of a request that identify it for caching
+        
+        Returns:
+            (system prompt, last user message), either None if not present
+        """
+        # Only use the system prompt and last user message for key generation
+        system_prompt = None
         for msg in messages:
             if msg.get("role") == "system":
-                key_parts.append(f"system:{msg.get('content', '')[:100]}")
+                system_prompt = msg.get('content', '')
                 break
         
-        # Last user message (most important for cache hit)
+        user_message = None
         for msg in reversed(messages):
             if msg.get("role") == "user":
-                key_parts.append(f"user:{msg.get('content', '')}")
+                user_message = msg.get('content', '')
                 break
-        
-        # Tools hash if provided
-        if tools_hash:
-            key_parts.append(f"tools:{tools_hash}")
-        
-        # Create hash
-        key_string = "|".join(key_parts)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return system_prompt, user_message
+    
+    def _semantic_context(self, system_prompt: Optional[str], tools_hash: Optional[str]) -> str:
+        """Semantic matches are only made between prompts with the same context"""
+        return f"{system_prompt[:100] if system_prompt is not None else ''}|{tools_hash or ''}"
     
     def get(self, messages: list, tools_hash: Optional[str] = None) -> Optional[Dict]:
         """
@@ -77,23 +119,45 @@ class ResponseCache:
             Cached response dict or None
         """
         key = self._generate_key(messages, tools_hash)
-        
-        if key not in self.cache:
-            return None
-        
-        entry = self.cache[key]
-        
-        # Check if expired
-        if datetime.now() - entry["timestamp"] > self.ttl:
-            del self.cache[key]
-            logger.debug(f"Cache entry expired: {key[:8]}")
+        response = self._get_entry(key)
+        if response is None and self.semantic_encoder is not None:
+            response = self._get_similar(messages, tools_hash)
+        return response
+    
+    def _get_similar(self, messages: list, tools_hash: Optional[str] = None) -> Optional[Dict]:
+        """Look up the cached response of the most similar earlier prompt"""
+        system_prompt, user_message = self._split_messages(messages)
+        index = self.semantic_indexes.get(self._semantic_context(system_prompt, tools_hash))
+        if index is None or not user_message:
             return None
         
-        # Check if it's a tool-call response (don't cache those)
-        if entry.get("has_tool_calls", False):
-            logger.debug(f"Cache entry has tool calls, skipping: {key[:8]}")
+        # Encode outside the lock, it is by far the slowest step
+        vector = index.encode(user_message)
+        with self.lock:
+            key = index.search(vector)
+        if key is None:
             return None
-        
+        return self._get_entry(key)
+    
+    def _get_entry(self, key: str) -> Optional[Dict]:
+        """Look up a cached response by cache key"""
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            
+            # Check if expired
+            if time.monotonic() > entry["expires_at"]:
+                self._remove_entry(key)
+                logger.debug(f"Cache entry expired: {key[:8]}")
+                return None
+            
+            # Check if it's a tool-call response (don't cache those)
+            if entry.get("has_tool_calls", False):
+                logger.debug(f"Cache entry has tool calls, skipping: {key[:8]}")
+                return None
+            
+            self.cache.move_to_end(key)
         logger.info(f"✅ Cache hit: {key[:8]}")
         return entry["response"]
     
@@ -112,63 +176,170 @@ class ResponseCache:
         if has_tool_calls:
             return
         
-        # Don't cache if cache is full
-        if len(self.cache) >= self.max_size:
-            # Remove oldest entries (simple FIFO)
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k]["timestamp"])
-            del self.cache[oldest_key]
-            logger.debug(f"Cache full, removed oldest entry: {oldest_key[:8]}")
+        key = self._generate_key(messages, tools_hash)
+        self._set_entry(key, response)
+        
+        if self.semantic_encoder is not None:
+            self._index_prompt(key, messages, tools_hash)
+    
+    def single_flight(self, messages: list, tools_hash: Optional[str] = None,
+                      scope: Optional[str] = None) -> ContextManager[bool]:
+        """
+        Claim a prompt while its response is generated (see SingleFlight.claim)
+        
+        Yields True if the caller should call the LLM, False once an identical
+        in-flight request has finished and its response can be read with get().
         
+        Args:
+            scope: Optional scope (e.g. the session ID) - only requests with the
+                same scope wait for each other; the cache key is unchanged
+        """
         key = self._generate_key(messages, tools_hash)
-        self.cache[key] = {
-            "response": response,
-            "timestamp": datetime.now(),
-            "has_tool_calls": has_tool_calls
-        }
+        if scope is not None:
+            hasher = new_hasher()
+            hasher.update(scope.encode("utf-8", "ignore"))
+            hasher.update(b"|")
+            hasher.update(key.encode("ascii"))
+            key = hasher.hexdigest()
+        return self.inflight.claim(key)
+    
+    def _index_prompt(self, key: str, messages: list, tools_hash: Optional[str] = None):
+        """Add the embedding of a cached prompt to the semantic index"""
+        system_prompt, user_message = self._split_messages(messages)
+        if not user_message:
+            return
+        
+        context_key = self._semantic_context(system_prompt, tools_hash)
+        with self.lock:
+            index = self.semantic_indexes.get(context_key)
+            if index is None:
+                from core.semantic_cache import SemanticIndex
+                index = SemanticIndex(self.semantic_encoder, threshold=self.semantic_threshold)
+                self.semantic_indexes[context_key] = index
+        
+        vector = index.encode(user_message)
+        with self.lock:
+            # Skip if the entry was evicted while encoding
+            if key in self.cache:
+                index.add(key, vector)
+    
+    def _set_entry(self, key: str, response: Dict, expires_at: Optional[float] = None):
+        """
+        Store a response under a cache key
+        
+        Args:
+            expires_at: Monotonic expiry time, for a copy of an entry from a shared
+                store that must not outlive it (defaults to now + TTL)
+        """
+        with self.lock:
+            # Replacing an entry moves it to the back
+            self.cache.pop(key, None)
+            self.expiry.pop(key, None)
+            
+            # Evict least recently used entries when full
+            while len(self.cache) >= self.max_size:
+                evicted_key = next(iter(self.cache))
+                self._remove_entry(evicted_key)
+                logger.debug(f"Cache full, removed least recently used entry: {evicted_key[:8]}")
+            
+            if expires_at is None:
+                expires_at = time.monotonic() + self.ttl.total_seconds()
+            self.cache[key] = {
+                "response": response,
+                "expires_at": expires_at,
+                "has_tool_calls": False
+            }
+            self.expiry[key] = expires_at
         logger.debug(f"Cached response: {key[:8]}")
     
+    def _remove_entry(self, key: str):
+        """Remove a cache entry and its embedding (caller holds self.lock)"""
+        del self.cache[key]
+        del self.expiry[key]
+        for index in self.semantic_indexes.values():
+            index.remove(key)
+    
     def clear(self):
         """Clear all cache entries"""
-        count = len(self.cache)
-        self.cache.clear()
+        with self.lock:
+            count = len(self.cache)
+            self.cache.clear()
+            self.expiry.clear()
+            for index in self.semantic_indexes.values():
+                index.clear()
         logger.info(f"Cleared {count} cache entries")
     
     def cleanup_expired(self) -> int:
-        """Remove expired entries"""
-        now = datetime.now()
-        expired = [
-            key for key, entry in self.cache.items()
-            if now - entry["timestamp"] > self.ttl
-        ]
-        for key in expired:
-            del self.cache[key]
+        """Remove expired entries (only the expired ones are visited, oldest first)"""
+        now = time.monotonic()
+        expired = 0
+        with self.lock:
+            while self.expiry:
+                key, expires_at = next(iter(self.expiry.items()))
+                if expires_at > now:
+                    break
+                self._remove_entry(key)
+                expired += 1
         if expired:
-            logger.info(f"Cleaned up {len(expired)} expired cache entries")
-        return len(expired)
+            logger.info(f"Cleaned up {expired} expired cache entries")
+        return expired
 
 
 # Global cache instance
 _response_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
 
 
 def get_cache() -> ResponseCache:
     """Get global cache instance"""
     global _response_cache
     if _response_cache is None:
-        import os
-        from dotenv import load_dotenv
-        load_dotenv()
-        ttl = int(os.getenv("RESPONSE_CACHE_TTL_MINUTES", "60"))
-        max_size = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "1000"))
-        _response_cache = ResponseCache(ttl_minutes=ttl, max_size=max_size)
+        with _cache_lock:
+            if _response_cache is None:
+                _response_cache = _create_cache()
     return _response_cache
 
 
-
-
-
-
-
-
-
-
+def _create_cache() -> ResponseCache:
+    """
+    Create the cache configured by the environment
+    
+    With RESPONSE_CACHE_BACKEND=redis responses are shared through Redis by all
+    workers and replicas, with a small in-process cache in front for the hottest
+    keys. With RESPONSE_CACHE_BACKEND=sqlite they are kept in a local SQLite file
+    (RESPONSE_CACHE_SQLITE_PATH) so the cache survives restarts. Otherwise they
+    live in this process.
+    
+    With RESPONSE_CACHE_SEMANTIC=true, prompts that miss the exact-match lookup are
+    also matched against similar cached prompts (needs sentence-transformers).
+    """
+    import os
+    from dotenv import load_dotenv
+    load_dotenv()
+    ttl = int(os.getenv("RESPONSE_CACHE_TTL_MINUTES", "60"))
+    max_size = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "1000"))
+    
+    semantic = {}
+    if os.getenv("RESPONSE_CACHE_SEMANTIC", "false").lower() == "true":
+        try:
+            from core.semantic_cache import load_encoder
+            semantic["semantic_encoder"] = load_encoder()
+            semantic["semantic_threshold"] = float(os.getenv("RESPONSE_CACHE_SEMANTIC_THRESHOLD", "0.92"))
+        except ImportError:
+            logger.warning("RESPONSE_CACHE_SEMANTIC is set but sentence-transformers is not installed, using exact-match caching only")
+    
+    backend = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+    l1_size = int(os.getenv("RESPONSE_CACHE_L1_SIZE", "128"))
+    if backend == "redis":
+        from core.redis_client import get_redis_client
+        redis_client = get_redis_client()
+        if redis_client is not None:
+            from core.redis_response_cache import RedisResponseCache
+            return RedisResponseCache(redis_client, ttl_minutes=ttl, l1_size=l1_size, **semantic)
+        logger.warning("RESPONSE_CACHE_BACKEND is redis but Redis is not available, using in-memory response cache")
+    elif backend == "sqlite":
+        from core.sqlite_response_cache import SQLiteResponseCache
+        path = os.getenv("RESPONSE_CACHE_SQLITE_PATH", "data/response_cache.db")
+        return SQLiteResponseCache(path, ttl_minutes=ttl, l1_size=l1_size, **semantic)
+    
+    return ResponseCache(ttl_minutes=ttl, max_size=max_size, **semantic)
@@ -0,0 +1,79 @@
+"""
+Embedding index for matching near-duplicate prompts in the response cache
+"""
+
+from typing import Dict, List, Optional
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def load_encoder(model_name: str = "all-MiniLM-L6-v2"):
+    """Load the sentence encoder used for semantic cache lookups"""
+    from sentence_transformers import SentenceTransformer
+    logger.info(f"Loading semantic cache encoder: {model_name}")
+    return SentenceTransformer(model_name)
+
+
+class SemanticIndex:
+    """
+    Nearest-neighbour lookup over cached prompts
+    
+    Embeddings are normalized when encoded, so one matrix-vector product gives the
+    cosine similarity of a query against every stored prompt.
+    """
+    
+    def __init__(self, encoder, threshold: float = 0.92, initial_capacity: int = 64):
+        self.encoder = encoder
+        self.threshold = threshold
+        self.dim = encoder.get_sentence_embedding_dimension()
+        self.embeddings = np.empty((initial_capacity, self.dim), dtype=np.float32)
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+    
+    def encode(self, text: str) -> np.ndarray:
+        """Embed text as a unit-length float32 vector"""
+        vector = self.encoder.encode(text, normalize_embeddings=True, convert_to_numpy=True)
+        return vector.astype(np.float32, copy=False)
+    
+    def add(self, key: str, vector: np.ndarray):
+        """Store the embedding for a cache key (replacing any previous one)"""
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self.embeddings):
+                grown = np.empty((row * 2, self.dim), dtype=np.float32)
+                grown[:row] = self.embeddings
+                self.embeddings = grown
+            self.keys.append(key)
+            self.rows[key] = row
+        self.embeddings[row] = vector
+    
+    def remove(self, key: str):
+        """Drop the embedding for a cache key"""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        # Move the last row into the freed slot so live rows stay contiguous
+        last_key = self.keys.pop()
+        if last_key != key:
+            self.embeddings[row] = self.embeddings[len(self.keys)]
+            self.keys[row] = last_key
+            self.rows[last_key] = row
+    
+    def clear(self):
+        """Drop all embeddings"""
+        self.keys.clear()
+        self.rows.clear()
+    
+    def search(self, vector: np.ndarray) -> Optional[str]:
+        """Return the cache key of the most similar stored prompt above the threshold"""
+        if not self.keys:
+            return None
+        scores = self.embeddings[:len(self.keys)] @ vector
+        best = int(scores.argmax())
+        if scores[best] > self.threshold:
+            logger.debug(f"Semantic cache match (similarity {scores[best]:.3f})")
+            return self.keys[best]
+        return None
@@ -2,111 +2,337 @@
 Session management for user conversations
 """
 
-from typing import Dict, Optional, List
-import uuid
-from datetime import datetime, timedelta
+from typing import Dict, Optional, List, NamedTuple, Tuple
+from collections import OrderedDict, deque
+from itertools import islice
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class Message(NamedTuple):
+    """A stored conversation message (a plain tuple, far smaller than a dict)"""
+    role: str
+    content: str
+    ts: float  # Wall clock (time.time())
+    
+    def to_dict(self) -> Dict:
+        """The message as returned to callers"""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": datetime.fromtimestamp(self.ts).isoformat(timespec="seconds")
+        }
+
+
+class History(deque):
+    """
+    Bounded conversation history that remembers its last rendered view
+    
+    The history is read (as dicts) far more often than it changes, so the last
+    rendering is kept until the next message is appended. The dicts are shared
+    between callers and must not be modified.
+    """
+    
+    def __init__(self, iterable=(), maxlen: Optional[int] = None):
+        super().__init__(iterable, maxlen)
+        self.view: Optional[Tuple[int, List[Dict]]] = None  # (count, rendered messages)
+    
+    def append(self, message: Message):
+        super().append(message)
+        self.view = None
+    
+    def recent(self, count: int) -> List[Dict]:
+        """Last count messages as dicts"""
+        view = self.view
+        if view is None or view[0] != count:
+            messages = [message.to_dict() for message in islice(self, max(0, len(self) - count), None)]
+            view = self.view = (count, messages)
+        return list(view[1])
+
+
 class SessionManager:
     """
     Manages user sessions and conversation context
+    
+    Safe to share between threads - sessions are only touched under self.lock.
+    Every operation is O(1) (apart from expiry sweeps), so one lock is held only
+    briefly and keeps the shared access order consistent.
     """
     
-    def __init__(self, session_timeout_minutes: int = 30):
-        self.sessions: Dict[str, Dict] = {}
-        self.session_timeout = timedelta(minutes=session_timeout_minutes)
-        logger.info(f"Session manager initialized (timeout: {session_timeout_minutes} minutes)")
+    def __init__(self, session_timeout_minutes: int = 30, max_sessions: int = 10000,
+                 max_history: int = 200):
+        # Kept in last-access order (least recently used first) so eviction and
+        # expiry only ever need to look at the front
+        self.sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self.lock = threading.RLock()
+        self.ttl_seconds = session_timeout_minutes * 60.0
+        self.max_sessions = max_sessions
+        # Older messages are dropped as new ones are added
+        self.max_history = max_history
+        # Expired sessions are swept by a background task (see start)
+        self.sweep_interval = 60.0
+        self.sweep_task: Optional[asyncio.Task] = None
+        logger.info(f"Session manager initialized (timeout: {session_timeout_minutes} minutes, max sessions: {max_sessions})")
+    
+    # Immutable defaults of a new session, copied in one go; mutable fields are
+    # filled in per session by _new_session
+    _SESSION_TEMPLATE = {
+        "created_at": None,
+        "last_accessed": None,
+        "conversation_history": None,
+        "user_preferences": None,
+        "current_itinerary": None,
+        "itinerary_normalized": False,  # Set once the API has filled in missing slots
+        "sources": None,  # Citations/sources from RAG
+        "sources_version": 0,  # Bumped whenever sources are added
+        "questions_asked": 0
+    }
+    
+    @staticmethod
+    def _new_session_id() -> str:
+        """Random 128-bit session ID (32 hex characters, as unguessable as a UUID4)"""
+        return os.urandom(16).hex()
+    
+    def _new_session(self) -> Dict:
+        """Initial state of a new session"""
+        session = self._SESSION_TEMPLATE.copy()
+        session["created_at"] = datetime.now()  # Wall clock, for display only
+        session["last_accessed"] = time.monotonic()
+        session["conversation_history"] = History(maxlen=self.max_history)
+        session["user_preferences"] = {}
+        session["sources"] = []
+        return session
     
     def create_session(self) -> str:
         """Create a new session"""
-        session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
-            "created_at": datetime.now(),
-            "last_accessed": datetime.now(),
-            "conversation_history": [],
-            "user_preferences": {},
-            "current_itinerary": None,
-            "sources": [],  # Citations/sources from RAG
-            "questions_asked": 0
-        }
-        logger.info(f"Created new session: {session_id}")
+        session_id = self._new_session_id()
+        session = self._new_session()
+        with self.lock:
+            # Evict least recently used sessions when at capacity
+            while len(self.sessions) >= self.max_sessions:
+                evicted_id, _ = self.sessions.popitem(last=False)
+                logger.info("Evicted least recently used session: %s", evicted_id)
+            
+            self.sessions[session_id] = session
+        logger.info("Created new session: %s", session_id)
         return session_id
     
     def get_session(self, session_id: str) -> Optional[Dict]:
         """Get session data"""
-        if session_id not in self.sessions:
-            return None
-        
-        session = self.sessions[session_id]
-        
-        # Check if session expired
-        if datetime.now() - session["last_accessed"] > self.session_timeout:
-            logger.info(f"Session {session_id} expired")
-            del self.sessions[session_id]
-            return None
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            
+            # Check if session expired
+            if time.monotonic() - session["last_accessed"] > self.ttl_seconds:
+                logger.info("Session %s expired", session_id)
+                self.sessions.pop(session_id, None)
+                return None
+            
+            # Update last accessed
+            self.touch(session_id)
+            return session
+    
+    async def acreate_session(self) -> str:
+        """Create a new session (async variant for the event loop)"""
+        # In-memory - nothing to wait for
+        return self.create_session()
+    
+    async def aget_session(self, session_id: str) -> Optional[Dict]:
+        """Get session data (async variant for the event loop)"""
+        return self.get_session(session_id)
+    
+    def get_session_view(self, session_id: str, history_limit: int = 10) -> Optional[Dict]:
+        """
+        Get the client-facing projection of a session
         
-        # Update last accessed
-        session["last_accessed"] = datetime.now()
-        return session
+        Returns:
+            conversation_history (last history_limit messages), user_preferences,
+            current_itinerary and questions_asked, or None if the session does not exist
+        """
+        with self.lock:
+            session = self.get_session(session_id)
+            if not session:
+                return None
+            return {
+                "conversation_history": session["conversation_history"].recent(history_limit),
+                "user_preferences": session["user_preferences"],
+                "current_itinerary": session["current_itinerary"],
+                "questions_asked": session["questions_asked"]
+            }
+    
+    async def aget_session_view(self, session_id: str, history_limit: int = 10) -> Optional[Dict]:
+        """Get the client-facing projection of a session (async variant for the event loop)"""
+        return self.get_session_view(session_id, history_limit)
+    
+    def get_session_sources(self, session_id: str) -> Optional[List[Dict]]:
+        """Get the sources (citations) collected in a session, or None if it does not exist"""
+        with self.lock:
+            session = self.get_session(session_id)
+            if not session:
+                return None
+            return session.get("sources") or []
+    
+    async def aget_session_sources(self, session_id: str) -> Optional[List[Dict]]:
+        """Get the sources collected in a session (async variant for the event loop)"""
+        return self.get_session_sources(session_id)
+    
+    def touch(self, session_id: str) -> bool:
+        """Mark session as just accessed (moves it to the back of the eviction order)"""
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return False
+            session["last_accessed"] = time.monotonic()
+            self.sessions.move_to_end(session_id)
+            return True
+    
+    def delete_session(self, session_id: str) -> bool:
+        """Delete session, returns False if it did not exist"""
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
     
     def update_session(self, session_id: str, updates: Dict):
         """Update session data"""
-        if session_id not in self.sessions:
-            return
-        
-        self.sessions[session_id].update(updates)
-        self.sessions[session_id]["last_accessed"] = datetime.now()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return
+            
+            session.update(updates)
+            self.touch(session_id)
     
     def add_message(self, session_id: str, role: str, content: str):
         """Add message to conversation history"""
-        if session_id not in self.sessions:
-            return
-        
-        self.sessions[session_id]["conversation_history"].append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        self.sessions[session_id]["last_accessed"] = datetime.now()
+        message = Message(role, content, time.time())
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return
+            
+            session["conversation_history"].append(message)
+            self.touch(session_id)
     
     def get_conversation_history(self, session_id: str, 
                                  max_messages: int = 30) -> List[Dict]:
         """Get recent conversation history"""
-        session = self.get_session(session_id)
-        if not session:
-            return []
-        
-        history = session["conversation_history"]
-        # Return last N messages
-        return history[-max_messages:] if len(history) > max_messages else history
+        with self.lock:
+            session = self.get_session(session_id)
+            if not session:
+                return []
+            
+            # Return last N messages (a copy, so it can't change under the caller)
+            return session["conversation_history"].recent(max_messages)
     
     def increment_questions(self, session_id: str):
         """Increment question count"""
-        if session_id in self.sessions:
-            self.sessions[session_id]["questions_asked"] += 1
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session["questions_asked"] += 1
     
     def get_questions_asked(self, session_id: str) -> int:
         """Get number of questions asked"""
         session = self.get_session(session_id)
         return session["questions_asked"] if session else 0
     
+    async def start(self):
+        """Start sweeping expired sessions in the background (call from the event loop)"""
+        if self.sweep_task is None:
+            self.sweep_task = asyncio.create_task(self._sweep_periodically())
+    
+    async def stop(self):
+        """Stop the background sweep"""
+        if self.sweep_task is not None:
+            self.sweep_task.cancel()
+            self.sweep_task = None
+    
+    async def _sweep_periodically(self):
+        """Drop expired sessions every sweep_interval seconds"""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.cleanup_expired_sessions()
+            except Exception as e:
+                logger.warning("Session sweep failed: %s", e)
+    
     def cleanup_expired_sessions(self):
-        """Remove expired sessions"""
-        now = datetime.now()
-        expired = [
-            sid for sid, session in self.sessions.items()
-            if now - session["last_accessed"] > self.session_timeout
-        ]
-        for sid in expired:
-            del self.sessions[sid]
+        """Remove expired sessions (only the expired ones are visited, oldest first)"""
+        now = time.monotonic()
+        expired = 0
+        # Oldest-accessed sessions are at the front, stop at the first live one
+        with self.lock:
+            while self.sessions:
+                sid, session = next(iter(self.sessions.items()))
+                if now - session["last_accessed"] <= self.ttl_seconds:
+                    break
+                self.sessions.pop(sid, None)
+                expired += 1
         if expired:
-            logger.info(f"Cleaned up {len(expired)} expired sessions")
-        return len(expired)
+            logger.info("Cleaned up %d expired sessions", expired)
+        return expired
 
 
+_session_manager: Optional[SessionManager] = None
+
+
+def get_session_manager() -> SessionManager:
+    """
+    Get global session manager instance
+    
+    Sessions are kept in Redis when SESSION_BACKEND=redis (the default when
+    REDIS_URL is set), so every worker and replica sees the same sessions.
+    Otherwise they live in this process.
+    """
+    global _session_manager
+    if _session_manager is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        timeout = int(os.getenv("SESSION_TIMEOUT_MINUTES", "30"))
+        max_history = int(os.getenv("SESSION_MAX_HISTORY", "200"))
+        backend = (os.getenv("SESSION_BACKEND") or ("redis" if os.getenv("REDIS_URL") else "memory")).lower()
+        
+        if backend == "redis":
+            from core.redis_client import get_redis_client
+            from core.redis_session_manager import RedisSessionManager
+            redis_client = get_redis_client()
+            if redis_client is not None:
+                _session_manager = RedisSessionManager(redis_client, session_timeout_minutes=timeout,
+                                                       max_history=max_history)
+            else:
+                logger.warning("SESSION_BACKEND is redis but Redis is not available, using in-memory sessions")
+        
+        if _session_manager is None:
+            max_sessions = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+            _session_manager = SessionManager(session_timeout_minutes=timeout, max_sessions=max_sessions,
+                                              max_history=max_history)
+    return _session_manager
+
+def sessions_are_shared() -> bool:
+    """
+    Whether sessions are visible to every worker process
+    
+    Only true with the Redis session store and a Redis server that answers;
+    in-memory sessions (and the per-session state kept next to them) belong to
+    a single process.
+    """
+    from core.redis_session_manager import RedisSessionManager
+    manager = get_session_manager()
+    if not isinstance(manager, RedisSessionManager):
+        return False
+    try:
+        return bool(manager.redis.ping())
+    except Exception as e:
+        logger.warning("Redis session store is not reachable: %s", e)
+        return False
+
 if __name__ == "__main__":
     # Test session manager
     logging.basicConfig(level=logging.INFO)
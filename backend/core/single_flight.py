@@ -0,0 +1,64 @@
+"""
+Request coalescing so identical concurrent calls do the expensive work once
+"""
+
+from typing import Dict, Iterator
+from contextlib import contextmanager
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Let one caller compute a value while identical concurrent callers wait for it
+    
+    The first caller to claim a key is the leader and computes (and caches) the
+    value. Callers claiming the same key meanwhile block until the leader is done
+    and then re-check the cache. Uses threads rather than asyncio futures since the
+    LLM, STT and TTS calls run in worker threads.
+    """
+    
+    def __init__(self, timeout: float = 60.0):
+        """
+        Initialize single-flight group
+        
+        Args:
+            timeout: Longest a caller waits for an in-flight call before computing itself
+        """
+        self.timeout = timeout
+        self.inflight: Dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+    
+    @contextmanager
+    def claim(self, key: str) -> Iterator[bool]:
+        """
+        Claim a key for the duration of the with block
+        
+        Yields:
+            True if the caller is the leader and should compute the value, False
+            once an identical in-flight call has finished (the value is then
+            usually in the cache; if it is not, the caller computes it itself)
+        """
+        with self.lock:
+            done = self.inflight.get(key)
+            if done is None:
+                done = self.inflight[key] = threading.Event()
+                leader = True
+            else:
+                leader = False
+        
+        if not leader:
+            logger.debug(f"Waiting for in-flight call: {key[:8]}")
+            if not done.wait(self.timeout):
+                logger.warning(f"In-flight call {key[:8]} still running after {self.timeout}s, not waiting any longer")
+            yield False
+            return
+        
+        try:
+            yield True
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            done.set()
@@ -0,0 +1,106 @@
+"""
+SQLite-backed LLM response cache that survives restarts
+"""
+
+from typing import Dict, Optional
+from pathlib import Path
+import json
+import logging
+import sqlite3
+import threading
+import time
+from core.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    Cache LLM responses in a local SQLite file
+    
+    Responses are stored as JSON with their expiry time, so a restart or deploy
+    starts with a warm cache instead of an empty one. The database runs in WAL mode
+    so reads don't wait on writes. The in-process cache sits in front for the
+    hottest keys. SQLite errors are logged and treated as a miss - the cache must
+    never fail a request.
+    """
+    
+    def __init__(self, path: str = "data/response_cache.db", ttl_minutes: int = 60,
+                 l1_size: int = 128, **kwargs):
+        super().__init__(ttl_minutes=ttl_minutes, max_size=l1_size, **kwargs)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by all threads, serialized by db_lock
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db_lock = threading.Lock()
+        with self.db_lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+        purged = self._purge_expired()
+        logger.info(f"SQLite response cache initialized ({path}, TTL: {ttl_minutes} min, L1 size: {l1_size}, purged {purged} expired)")
+    
+    def _get_entry(self, key: str) -> Optional[Dict]:
+        """Look up a cached response, in-process first and then in SQLite"""
+        response = super()._get_entry(key)
+        if response is not None:
+            return response
+        
+        try:
+            with self.db_lock:
+                row = self.db.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        
+        response_json, stored_expires_at = row
+        response = json.loads(response_json)
+        # Promote into the in-process cache, expiring when the stored row does
+        # (rows hold wall-clock times, the in-process cache monotonic ones)
+        expires_at = time.monotonic() + (stored_expires_at - time.time())
+        super()._set_entry(key, response, expires_at)
+        logger.info(f"✅ Cache hit (sqlite): {key[:8]}")
+        return response
+    
+    def _set_entry(self, key: str, response: Dict, expires_at: Optional[float] = None):
+        """Store a response in SQLite and the in-process cache"""
+        super()._set_entry(key, response, expires_at)
+        try:
+            with self.db_lock:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(response), time.time() + self.ttl.total_seconds())
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+    
+    def _purge_expired(self) -> int:
+        """Delete expired rows from the database"""
+        try:
+            with self.db_lock:
+                return self.db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache cleanup failed: {e}")
+            return 0
+    
+    def clear(self):
+        """Clear all cache entries, including the database"""
+        super().clear()
+        try:
+            with self.db_lock:
+                self.db.execute("DELETE FROM responses")
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache clear failed: {e}")
+    
+    def cleanup_expired(self) -> int:
+        """Remove expired entries from memory and the database"""
+        super().cleanup_expired()
+        return self._purge_expired()
@@ -2,18 +2,57 @@
 Tool result caching to avoid redundant API calls
 """
 
-from typing import Dict, Optional, Any
-from datetime import datetime, timedelta
-import hashlib
+from typing import Dict, FrozenSet, Iterable, Optional, Any, Set, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
 import json
 import logging
+import threading
+import time
+import zlib
+import orjson
+from core.hashing import new_hasher
 
 logger = logging.getLogger(__name__)
 
+# Serialized results larger than this are zlib-compressed
+COMPRESS_MIN_BYTES = 4096
+
+# Least recently used entries compared when evicting
+EVICTION_SAMPLE_SIZE = 8
+
+
+def _canonical_json(value: Any) -> str:
+    """Compact JSON with sorted keys (anything JSON can't encode falls back to str)"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+@lru_cache(maxsize=2048)
+def _hash_key(function_name: str, items: Tuple[Tuple[str, str], ...]) -> str:
+    """Hash a function name and its canonical (name, value) argument pairs"""
+    hasher = new_hasher()
+    hasher.update(function_name.encode("utf-8"))
+    hasher.update(b"\x00")
+    for k, v in items:
+        hasher.update(k.encode("utf-8"))
+        hasher.update(b"=")
+        hasher.update(v.encode("utf-8"))
+        hasher.update(b";")
+    return hasher.hexdigest()
+
 
 class ToolCache:
     """
     Cache tool execution results to reduce redundant calls
+    
+    Results are stored serialized (orjson, zlib-compressed when large) rather than
+    as live dicts, which takes a fraction of the memory for POI lists, and every
+    hit gets its own copy to modify.
+    
+    Safe to share between threads - entries are only changed under self.lock.
+    Lookups read the dict without it (a single dict read is atomic) and take the
+    lock only to update recency or drop an expired entry.
     """
     
     def __init__(self, ttl_hours: int = 24, max_size: int = 500):
@@ -24,8 +63,18 @@ class ToolCache:
             ttl_hours: Time-to-live for cache entries in hours
             max_size: Maximum number of cache entries
         """
-        self.cache: Dict[str, Dict] = {}
-        self.ttl = timedelta(hours=ttl_hours)
+        # Kept in last-use order (least recently used first) so eviction is O(1)
+        self.cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.lock = threading.RLock()
+        # Functions that have ever had a result cached; lookups for any other
+        # function (e.g. ones whose results are never cached) skip key hashing
+        self.cached_functions: Set[str] = set()
+        # function name -> (argument names in key order, the same as a set)
+        self.key_layouts: Dict[str, Tuple[Tuple[str, ...], FrozenSet[str]]] = {}
+        self.ttl_seconds = ttl_hours * 3600.0
+        # Entries that are never looked up again are swept out at most this often
+        self.sweep_interval = 60.0
+        self.next_sweep = time.monotonic() + self.sweep_interval
         self.max_size = max_size
         logger.info(f"Tool cache initialized (TTL: {ttl_hours} hours, Max size: {max_size})")
     
@@ -40,14 +89,32 @@ class ToolCache:
         Returns:
             Cache key string
         """
-        # Normalize args (sort keys, remove None values)
-        normalized_args = {
-            k: v for k, v in sorted(args.items()) 
+        # Canonical form: sorted keys, no None values, values as strings (so 1 and
+        # 1.0 stay distinct). The get-then-set of a miss hashes the same args twice,
+        # so digests are memoized on it.
+        layout = self.key_layouts.get(function_name)
+        if layout is not None and layout[1].issuperset(args):
+            # Known tool: argument order is precomputed, no per-call sort
+            pairs = ((k, args.get(k)) for k in layout[0])
+        else:
+            pairs = sorted(args.items())
+        items = tuple(
+            (k, _canonical_json(v) if isinstance(v, (dict, list)) else repr(v))
+            for k, v in pairs
             if v is not None
-        }
+        )
+        return _hash_key(function_name, items)
+    
+    def register_key_builder(self, function_name: str, arg_names: Iterable[str]):
+        """
+        Register the argument names of a tool with a fixed schema
         
-        key_string = f"{function_name}:{json.dumps(normalized_args, sort_keys=True)}"
-        return hashlib.md5(key_string.encode()).hexdigest()
+        Calls that only use these arguments have their key built in a precomputed
+        order instead of sorting the arguments on every lookup. The keys are the
+        same either way, so calls with unexpected arguments just take the generic path.
+        """
+        names = tuple(sorted(arg_names))
+        self.key_layouts[function_name] = (names, frozenset(names))
     
     def get(self, function_name: str, args: Dict[str, Any]) -> Optional[Dict]:
         """
@@ -60,21 +127,32 @@ class ToolCache:
         Returns:
             Cached result dict or None
         """
+        if function_name not in self.cached_functions:
+            return None
+        
         key = self._generate_key(function_name, args)
         
-        if key not in self.cache:
+        entry = self.cache.get(key)
+        if entry is None:
             return None
         
-        entry = self.cache[key]
-        
         # Check if expired
-        if datetime.now() - entry["timestamp"] > self.ttl:
-            del self.cache[key]
-            logger.debug(f"Tool cache entry expired: {function_name}:{key[:8]}")
+        if time.monotonic() > entry["expires_at"]:
+            with self.lock:
+                # Unless another thread replaced it meanwhile
+                if self.cache.get(key) is entry:
+                    del self.cache[key]
+            logger.debug("Tool cache entry expired: %s:%.8s", function_name, key)
             return None
         
-        logger.info(f"✅ Tool cache hit: {function_name}:{key[:8]}")
-        return entry["result"]
+        with self.lock:
+            # Skip if it was evicted meanwhile - the result is still good to return
+            if self.cache.get(key) is entry:
+                entry["hits"] += 1
+                self.cache.move_to_end(key)
+        logger.debug("Tool cache hit: %s:%.8s", function_name, key)
+        data = entry["data"]
+        return orjson.loads(zlib.decompress(data) if entry["compressed"] else data)
     
     def set(self, function_name: str, args: Dict[str, Any], result: Dict):
         """
@@ -85,24 +163,67 @@ class ToolCache:
             args: Function arguments
             result: Tool result to cache
         """
-        # Don't cache if cache is full
-        if len(self.cache) >= self.max_size:
-            # Remove oldest entries
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k]["timestamp"])
-            del self.cache[oldest_key]
-            logger.debug(f"Tool cache full, removed oldest entry: {oldest_key[:8]}")
+        try:
+            data = orjson.dumps(result)
+        except TypeError as e:
+            logger.debug("Not caching %s result, it is not JSON-serializable: %s", function_name, e)
+            return
+        compressed = len(data) > COMPRESS_MIN_BYTES
+        if compressed:
+            data = zlib.compress(data, 1)
         
         key = self._generate_key(function_name, args)
-        self.cache[key] = {
-            "result": result,
-            "timestamp": datetime.now()
-        }
-        logger.debug(f"Cached tool result: {function_name}:{key[:8]}")
+        now = time.monotonic()
+        
+        with self.lock:
+            self._maybe_sweep(now)
+            
+            # Replacing an entry moves it to the back
+            self.cache.pop(key, None)
+            
+            while len(self.cache) >= self.max_size:
+                self._evict()
+            
+            self.cached_functions.add(function_name)
+            self.cache[key] = {
+                "data": data,
+                "compressed": compressed,
+                "expires_at": now + self.ttl_seconds,
+                "hits": 0
+            }
+        logger.debug("Cached tool result: %s:%.8s", function_name, key)
+    
+    def _maybe_sweep(self, now: float):
+        """Drop expired entries if a sweep is due (caller holds self.lock)"""
+        if now < self.next_sweep:
+            return
+        self.next_sweep = now + self.sweep_interval
+        expired = [key for key, entry in self.cache.items() if now > entry["expires_at"]]
+        for key in expired:
+            del self.cache[key]
+        if expired:
+            logger.debug("Swept %d expired tool cache entries", len(expired))
+    
+    def _evict(self):
+        """
+        Evict one entry (caller holds self.lock)
+        
+        Looks at the EVICTION_SAMPLE_SIZE least recently used entries and drops the
+        one with the fewest hits (the least recently used of those on a tie), so
+        results that keep getting reused survive a quiet spell. The sample is a
+        fixed size to keep each insert O(1), at the cost of hit counts only
+        being weighed among those few entries (close to plain LRU otherwise).
+        """
+        evicted_key, entry = min(islice(self.cache.items(), EVICTION_SAMPLE_SIZE), key=lambda item: item[1]["hits"])
+        del self.cache[evicted_key]
+        logger.debug("Tool cache full, removed entry: %.8s (%d hits)", evicted_key, entry["hits"])
     
     def clear(self):
         """Clear all cache entries"""
-        count = len(self.cache)
-        self.cache.clear()
+        with self.lock:
+            count = len(self.cache)
+            self.cache.clear()
+            self.cached_functions.clear()
         logger.info(f"Cleared {count} tool cache entries")
 
 
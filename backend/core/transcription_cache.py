@@ -0,0 +1,87 @@
+"""
+Transcription caching so repeated audio skips the STT API
+"""
+
+from typing import BinaryIO, Dict, Optional, Union
+import json
+import threading
+from core.hashing import new_hasher
+from core.keyed_cache import KeyedCache, select_redis_client
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class TranscriptionCache(KeyedCache):
+    """
+    Cache STT results keyed by a hash of the audio content
+    
+    Results are kept as JSON in Redis under stt:v1:{key}, or in the in-process
+    LRU (see KeyedCache).
+    """
+    
+    KEY_PREFIX = "stt:v1:"
+    NAME = "Transcription cache"
+    
+    def __init__(self, redis_client=None, ttl_days: int = 14, max_size: int = 500):
+        """
+        Initialize transcription cache
+        
+        Args:
+            redis_client: Optional Redis client to store results in
+            ttl_days: Time-to-live for cache entries in days
+            max_size: Maximum number of in-process entries (without Redis)
+        """
+        super().__init__(redis_client, ttl_days=ttl_days, max_size=max_size)
+    
+    def generate_key(self, audio: Union[bytes, BinaryIO], *params: str) -> str:
+        """
+        Generate cache key from the audio content and transcription parameters
+        
+        Args:
+            audio: Audio bytes or binary file (read in chunks, then rewound)
+            params: Anything else the transcript depends on (provider, language, model)
+        """
+        hasher = new_hasher()
+        for param in params:
+            hasher.update(param.encode("utf-8"))
+            hasher.update(b"|")
+        if isinstance(audio, (bytes, bytearray)):
+            hasher.update(audio)
+        else:
+            audio.seek(0)
+            while chunk := audio.read(HASH_CHUNK_SIZE):
+                hasher.update(chunk)
+            audio.seek(0)
+        return hasher.hexdigest()
+    
+    def _encode(self, result: Dict) -> str:
+        return json.dumps(result)
+    
+    def _decode(self, raw: bytes) -> Dict:
+        return json.loads(raw)
+
+
+# Global cache instance
+_transcription_cache: Optional[TranscriptionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> TranscriptionCache:
+    """
+    Get global transcription cache instance
+    
+    Uses Redis when TRANSCRIPTION_CACHE_BACKEND=redis (the default when REDIS_URL
+    is set), otherwise an in-process cache.
+    """
+    global _transcription_cache
+    if _transcription_cache is None:
+        with _cache_lock:
+            if _transcription_cache is None:
+                import os
+                from dotenv import load_dotenv
+                load_dotenv()
+                ttl_days = int(os.getenv("TRANSCRIPTION_CACHE_TTL_DAYS", "14"))
+                max_size = int(os.getenv("TRANSCRIPTION_CACHE_MAX_SIZE", "500"))
+                redis_client = select_redis_client("TRANSCRIPTION_CACHE_BACKEND", "transcription cache")
+                _transcription_cache = TranscriptionCache(redis_client, ttl_days=ttl_days, max_size=max_size)
+    return _transcription_cache
@@ -0,0 +1,74 @@
+"""
+TTS audio caching so repeated phrases skip re-synthesis
+"""
+
+from typing import Optional
+import threading
+from core.hashing import new_hasher
+from core.keyed_cache import KeyedCache, select_redis_client
+
+
+class TTSCache(KeyedCache):
+    """
+    Cache synthesized audio keyed by a hash of the text and voice settings
+    
+    Audio is kept raw in Redis under tts:v1:{key}, or in the in-process LRU (see
+    KeyedCache). Clips above max_item_bytes are not cached.
+    """
+    
+    KEY_PREFIX = "tts:v1:"
+    NAME = "TTS cache"
+    
+    def __init__(self, redis_client=None, ttl_days: int = 7, max_size: int = 200,
+                 max_item_bytes: int = 256 * 1024):
+        """
+        Initialize TTS cache
+        
+        Args:
+            redis_client: Optional Redis client to store audio in
+            ttl_days: Time-to-live for cache entries in days
+            max_size: Maximum number of in-process entries (without Redis)
+            max_item_bytes: Largest audio clip that is cached
+        """
+        super().__init__(redis_client, ttl_days=ttl_days, max_size=max_size)
+        self.max_item_bytes = max_item_bytes
+    
+    def generate_key(self, text: str, *params) -> str:
+        """Generate cache key from the text and synthesis parameters (provider, voice, speed, format...)"""
+        hasher = new_hasher()
+        for param in params:
+            hasher.update(str(param).encode("utf-8"))
+            hasher.update(b"|")
+        hasher.update(text.encode("utf-8"))
+        return hasher.hexdigest()
+    
+    def _cacheable(self, audio: bytes) -> bool:
+        return len(audio) <= self.max_item_bytes
+
+
+# Global cache instance
+_tts_cache: Optional[TTSCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """
+    Get global TTS cache instance
+    
+    Uses Redis when TTS_CACHE_BACKEND=redis (the default when REDIS_URL is set),
+    otherwise an in-process cache.
+    """
+    global _tts_cache
+    if _tts_cache is None:
+        with _cache_lock:
+            if _tts_cache is None:
+                import os
+                from dotenv import load_dotenv
+                load_dotenv()
+                ttl_days = int(os.getenv("TTS_CACHE_TTL_DAYS", "7"))
+                max_size = int(os.getenv("TTS_CACHE_MAX_SIZE", "200"))
+                max_item_kb = int(os.getenv("TTS_CACHE_MAX_ITEM_KB", "256"))
+                redis_client = select_redis_client("TTS_CACHE_BACKEND", "TTS cache")
+                _tts_cache = TTSCache(redis_client, ttl_days=ttl_days, max_size=max_size,
+                                      max_item_bytes=max_item_kb * 1024)
+    return _tts_cache
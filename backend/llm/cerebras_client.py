@@ -2,46 +2,134 @@
 Cerebras LLM client configuration
 """
 
+import ast
 import requests
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
 import logging
 import json
 import re
-
-load_dotenv()
+import orjson
+from core.http_client import get_http_session
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 is optional (httpx comes with the groq SDK, h2 has to be installed)
+try:
+    import httpx
+    import h2  # noqa: F401 - required by httpx for http2=True
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Parses a JSON value starting at an offset into a larger string
+_JSON_DECODER = json.JSONDecoder()
+
+# failed_generation quoted inside an error message, single or double quoted
+_FAILED_GEN_SQ_RE = re.compile(r"'failed_generation':\s*'([^']+)'")
+_FAILED_GEN_DQ_RE = re.compile(r'"failed_generation":\s*"([^"]+)"')
+# A Python-style call on one line: function_name(...)
+_FUNC_CALL_RE = re.compile(r'(\w+)\s*\((.*)\)')
+
+
+@lru_cache(maxsize=32)
+def _compile_tool_patterns(tool_names: Tuple[str, ...]) -> Tuple[re.Pattern, re.Pattern, re.Pattern]:
+    """
+    Patterns for tool calls written as text, compiled once per set of tool names
+    
+    Returns patterns for name({json}), name{json} and name(kwargs) respectively.
+    """
+    names = "|".join(re.escape(name) for name in tool_names)
+    return (
+        re.compile(rf'\b({names})\s*\(\s*{{'),
+        re.compile(rf'\b({names})\s*{{'),
+        re.compile(rf'\b({names})\s*\(')
+    )
+
+
+# Response objects, with the same attributes as the Groq SDK's so callers can
+# treat every provider alike
+class _Function:
+    """Function name and JSON-encoded arguments of a tool call"""
+    
+    __slots__ = ("name", "arguments")
+    
+    def __init__(self, name: str, arguments: str):
+        self.name = name
+        self.arguments = arguments
+
+
+class _ToolCall:
+    """A tool call requested by the model"""
+    
+    __slots__ = ("id", "type", "function")
+    
+    def __init__(self, id: str, type: str, function: _Function):
+        self.id = id
+        self.type = type
+        self.function = function
+
+
+class _Message:
+    """Assistant message (text content and/or tool calls)"""
+    
+    __slots__ = ("content", "tool_calls")
+    
+    def __init__(self, content: Optional[str], tool_calls: Optional[List[_ToolCall]]):
+        self.content = content
+        self.tool_calls = tool_calls
+
+
+class _Usage:
+    """Token usage of a completion"""
+    
+    __slots__ = ("prompt_tokens", "completion_tokens", "total_tokens")
+    
+    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0, total_tokens: int = 0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = total_tokens
+
+
+def _parse_call_arguments(args_str: str):
+    """
+    Arguments of a Python-style call written out by the model, or None
+    
+    Handles keyword arguments (query="x", top_k=5), a dict literal and bare
+    "key": value pairs. Python literals parse natively (either quote style,
+    None/True/False, nested quotes); JSON (true/false/null) is tried last.
+    """
+    literal = args_str
+    if not args_str.lstrip().startswith('{'):
+        try:
+            call = ast.parse(f"_f({args_str})", mode="eval").body
+            if isinstance(call, ast.Call) and call.keywords and not call.args:
+                return {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+        except (SyntaxError, ValueError, TypeError):
+            pass
+        literal = '{' + args_str + '}'
+    try:
+        return ast.literal_eval(literal)
+    except (SyntaxError, ValueError, TypeError):
+        pass
+    try:
+        return orjson.loads(literal)
+    except orjson.JSONDecodeError:
+        return None
+
+
+def _make_tool_call(name: str, arguments: str, tool_call_id: str, type: str = "function") -> _ToolCall:
+    """Build a tool call object from its name, JSON-encoded arguments and ID"""
+    return _ToolCall(tool_call_id, type, _Function(name, arguments))
+
 
 class CerebrasClient:
     """Cerebras LLM client wrapper"""
     
-    def __init__(self, model: str = "llama-3.3-70b"):
-        """
-        Initialize Cerebras client
-        
-        Args:
-            model: Model name (default: llama-3.3-70b)
-        """
-        api_key = os.getenv("CEREBRAS_API_KEY")
-        if not api_key:
-            raise ValueError("CEREBRAS_API_KEY not found in environment variables. Please set it in .env file.")
-        
-        base_url = os.getenv("CEREBRAS_BASE_URL", "https://api.cerebras.ai/v1")
-        self.api_key = api_key
-        self.base_url = base_url.rstrip('/')
-        self.model = model
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        logger.info(f"✅ Cerebras client initialized with model: {model}")
-    
-    def get_system_prompt(self) -> str:
-        """Get the system prompt for the travel assistant"""
-        return """You are a helpful travel planning assistant specializing in Jaipur, India.
+    # System prompt for the travel assistant (constant, so built once)
+    SYSTEM_PROMPT = """You are a helpful travel planning assistant specializing in Jaipur, India.
 
 **CRITICAL FUNCTION CALLING INSTRUCTIONS:**
 You MUST use the function calling tools provided. DO NOT respond with text-only answers when tools are available.
@@ -101,25 +189,94 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
 - Use the retrieved information to answer
 
 **IMPORTANT:** If tools are available, you MUST use them. Do not provide text-only responses when you should be calling functions."""
+    # The system message as sent to the API, shared by every request
+    _SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
     
-    def _clean_messages(self, messages: List[Dict]) -> List[Dict]:
+    def __init__(self, model: str = "llama-3.3-70b", http_session: Optional[requests.Session] = None):
+        """
+        Initialize Cerebras client
+        
+        Args:
+            model: Model name (default: llama-3.3-70b)
+            http_session: Optional requests session (defaults to the shared pooled session)
+        """
+        # Shared pooled session so each completion reuses a keep-alive connection
+        # instead of paying a new TCP + TLS handshake to the API
+        self.http_session = http_session or get_http_session()
+        # .env is read when a client is created, not when the module is imported
+        load_dotenv()
+        api_key = os.getenv("CEREBRAS_API_KEY")
+        if not api_key:
+            raise ValueError("CEREBRAS_API_KEY not found in environment variables. Please set it in .env file.")
+        
+        base_url = os.getenv("CEREBRAS_BASE_URL", "https://api.cerebras.ai/v1")
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.chat_url = f"{self.base_url}/chat/completions"
+        self.model = model
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        # Optional HTTP/2 client: concurrent completions are multiplexed over one
+        # connection instead of each taking a pooled HTTP/1.1 connection
+        self.http2_client = None
+        if os.getenv("CEREBRAS_HTTP2", "false").lower() == "true":
+            if HTTP2_AVAILABLE:
+                self.http2_client = httpx.Client(http2=True, timeout=60.0,
+                                                 limits=httpx.Limits(max_keepalive_connections=20))
+            else:
+                logger.warning("CEREBRAS_HTTP2 is set but h2 is not installed (pip install h2), using HTTP/1.1")
+        # (tools list, its validated tools, their text patterns) for the last list passed in
+        self._validated_tools: Optional[Tuple[List, List[Dict], Tuple[re.Pattern, ...]]] = None
+        logger.info("✅ Cerebras client initialized with model: %s", model)
+    
+    def _post(self, url: str, body: bytes):
+        """
+        POST a JSON body to the API over HTTP/2 when enabled, otherwise the pooled session
+        
+        httpx transport errors are raised as the matching requests exceptions, so
+        callers handle both transports the same way. Both responses have the
+        status_code, headers, content and text used by chat_completion.
+        """
+        if self.http2_client is None:
+            return self.http_session.post(url, headers=self.headers, data=body, timeout=60)
+        try:
+            return self.http2_client.post(url, headers=self.headers, content=body)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+    
+    def get_system_prompt(self) -> str:
+        """Get the system prompt for the travel assistant"""
+        return self.SYSTEM_PROMPT
+    
+    def _iter_cleaned_messages(self, messages: List[Dict]) -> Iterator[Dict]:
         """
         Clean messages to ensure they're in the correct format for Cerebras
         
-        Cerebras API expects tool messages in a nested format:
+        Yields each message in its final form - this is the only pass over the
+        messages before they are sent, and nothing is built in between. Tool
+        messages are accepted flat or nested under "tool" and always come out
+        in the FLAT format Cerebras expects:
         {
             "role": "tool",
-            "tool": {
-                "tool_call_id": "...",
-                "name": "...",
-                "content": "..."
-            }
+            "tool_call_id": "...",
+            "content": "...",
+            "name": "..."  (optional)
         }
+        Tool messages without a tool_call_id are dropped.
         """
-        cleaned = []
         for i, msg in enumerate(messages):
             role = msg.get("role", "")
             content = msg.get("content")
+            
+            # Our own system prompt is already in API shape
+            if content is self.SYSTEM_PROMPT and role == "system":
+                yield self._SYSTEM_MESSAGE
+                continue
+            
             tool_calls = msg.get("tool_calls")
             
             # Handle tool role messages - Cerebras expects FLAT format (not nested!)
@@ -132,46 +289,52 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                 content = msg.get("content") or tool_obj.get("content")
                 
                 # Log the raw message for debugging
-                logger.info(f"Cerebras: Processing tool message {i}: tool_call_id={tool_call_id}, name={name}, content_type={type(content)}")
+                logger.debug("Cerebras: Processing tool message %d: tool_call_id=%s, name=%s, content_type=%s",
+                             i, tool_call_id, name, type(content).__name__)
                 
                 # Validate required fields
                 if not tool_call_id:
-                    logger.error(f"❌ Tool message {i} missing tool_call_id, skipping. Message keys: {list(msg.keys())}")
+                    logger.error("❌ Tool message %d missing tool_call_id, skipping. Message keys: %s", i, list(msg.keys()))
                     continue
                 
                 # Ensure content is a non-empty string (Cerebras requires it)
                 if content is None:
-                    logger.warning(f"⚠️  Tool message {i} has None content, using empty JSON object")
+                    logger.warning("⚠️  Tool message %d has None content, using empty JSON object", i)
                     content = "{}"
                 elif content == "":
-                    logger.warning(f"⚠️  Tool message {i} has empty string content, using empty JSON object")
+                    logger.warning("⚠️  Tool message %d has empty string content, using empty JSON object", i)
                     content = "{}"
                 elif not isinstance(content, str):
                     # Convert to JSON string if it's not already a string
                     try:
-                        content = json.dumps(content) if content else "{}"
+                        content = orjson.dumps(content).decode() if content else "{}"
                     except (TypeError, ValueError):
                         content = str(content) if content else "{}"
                 
-                # Ensure tool_call_id is a string
-                tool_call_id_str = str(tool_call_id).strip() if tool_call_id else ""
+                # Ensure tool_call_id is a string (it usually already is)
+                tool_call_id_str = (tool_call_id if isinstance(tool_call_id, str) else str(tool_call_id)).strip()
                 if not tool_call_id_str:
-                    logger.error(f"❌ Tool message {i} has empty tool_call_id after conversion, skipping")
+                    logger.error("❌ Tool message %d has empty tool_call_id after conversion, skipping", i)
                     continue
                 
                 # Cerebras expects FLAT structure: role, tool_call_id, and content at top level
+                # (content is a string by now)
+                content = content.strip() or "{}"
                 cleaned_msg = {
                     "role": "tool",
                     "tool_call_id": tool_call_id_str,
-                    "content": str(content)
+                    "content": content
                 }
                 
                 # Add name if provided (optional field)
                 if name:
-                    cleaned_msg["name"] = str(name)
+                    name = (name if isinstance(name, str) else str(name)).strip()
+                    if name:
+                        cleaned_msg["name"] = name
                 
-                logger.info(f"✅ Cerebras: Converted tool message {i} - tool_call_id: {tool_call_id_str[:20]}..., content_length: {len(str(content))}")
-                cleaned.append(cleaned_msg)
+                logger.info("✅ Cerebras: Converted tool message %d - tool_call_id: %.20s..., content_length: %d",
+                            i, tool_call_id_str, len(content))
+                yield cleaned_msg
                 continue
             
             # Skip empty messages (except system messages)
@@ -190,9 +353,7 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
             # Note: We intentionally don't copy 'timestamp' or other unsupported fields
             # Cerebras API doesn't support timestamp in messages
             
-            cleaned.append(cleaned_msg)
-        
-        return cleaned
+            yield cleaned_msg
     
     def _extract_tool_calls_from_text(self, content: str, tools: Optional[List[Dict]] = None) -> List[Dict]:
         """
@@ -204,95 +365,73 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
         if not content or not tools:
             return []
         
+        # Every pattern needs a ( or { after the name - plain prose has neither
+        if '(' not in content and '{' not in content:
+            return []
+        
         tool_calls = []
-        tool_names = [t.get('function', {}).get('name', '') for t in tools]
+        # (name, arguments) of every call added so far, to skip duplicates
+        seen = set()
+        pattern1, pattern2, pattern3 = self._tool_patterns(tools)
         
         # Pattern 1: function_name({json}) format
-        # Example: retrieve_city_guidance(query="Jaipur cultural trip", top_k=5)
-        pattern1 = rf'\b({"|".join(re.escape(name) for name in tool_names)})\s*\(\s*{{'
-        for match in re.finditer(pattern1, content):
+        # Example: retrieve_city_guidance({"query": "Jaipur cultural trip", "top_k": 5})
+        for match in pattern1.finditer(content):
             func_name = match.group(1)
             start_pos = match.end() - 1  # Position of opening brace
             
-            # Extract JSON by finding balanced braces
-            brace_count = 0
-            json_str = ""
-            for i in range(start_pos, len(content)):
-                char = content[i]
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                
-                json_str += char
-                
-                if brace_count == 0:
-                    # Check if next is closing paren
-                    remaining = content[i+1:].strip()
-                    if remaining.startswith(')'):
-                        try:
-                            func_args = json.loads(json_str)
-                            tool_calls.append({
-                                "id": f"call_extracted_{len(tool_calls)}",
-                                "type": "function",
-                                "function": {
-                                    "name": func_name,
-                                    "arguments": json_str
-                                }
-                            })
-                            logger.info(f"   ✅ Extracted {func_name} from text (parentheses format)")
-                        except json.JSONDecodeError:
-                            logger.warning(f"   Failed to parse JSON for {func_name}")
-                    break
+            # Parse the JSON object in place (the C scanner finds where it ends)
+            try:
+                _, end_pos = _JSON_DECODER.raw_decode(content, start_pos)
+            except json.JSONDecodeError:
+                logger.warning("   Failed to parse JSON for %s", func_name)
+                continue
+            
+            # Check if next is closing paren
+            if not content[end_pos:].lstrip().startswith(')'):
+                continue
+            json_str = content[start_pos:end_pos]
+            if (func_name, json_str) not in seen:
+                seen.add((func_name, json_str))
+                tool_calls.append({
+                    "id": f"call_extracted_{len(tool_calls)}",
+                    "type": "function",
+                    "function": {
+                        "name": func_name,
+                        "arguments": json_str
+                    }
+                })
+                logger.info("   ✅ Extracted %s from text (parentheses format)", func_name)
         
         # Pattern 2: function_name{json} format (no parentheses)
         # Example: search_pois{"interests": ["culture"]}
-        pattern2 = rf'\b({"|".join(re.escape(name) for name in tool_names)})\s*{{'
-        for match in re.finditer(pattern2, content):
+        for match in pattern2.finditer(content):
             func_name = match.group(1)
             start_pos = match.end() - 1
             
-            # Extract JSON by finding balanced braces
-            brace_count = 0
-            json_str = ""
-            for i in range(start_pos, len(content)):
-                char = content[i]
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                
-                json_str += char
-                
-                if brace_count == 0:
-                    try:
-                        func_args = json.loads(json_str)
-                        # Check if this tool call was already added (avoid duplicates)
-                        already_added = False
-                        for tc in tool_calls:
-                            if (tc.get("function", {}).get("name") == func_name and 
-                                tc.get("function", {}).get("arguments", "") == json_str):
-                                already_added = True
-                                break
-                        
-                        if not already_added:
-                            tool_calls.append({
-                                "id": f"call_extracted_{len(tool_calls)}",
-                                "type": "function",
-                                "function": {
-                                    "name": func_name,
-                                    "arguments": json_str
-                                }
-                            })
-                            logger.info(f"   ✅ Extracted {func_name} from text (no parentheses format)")
-                    except json.JSONDecodeError:
-                        logger.warning(f"   Failed to parse JSON for {func_name}")
-                    break
+            try:
+                _, end_pos = _JSON_DECODER.raw_decode(content, start_pos)
+            except json.JSONDecodeError:
+                logger.warning("   Failed to parse JSON for %s", func_name)
+                continue
+            
+            json_str = content[start_pos:end_pos]
+            # Skip calls that were already added (avoid duplicates)
+            if (func_name, json_str) not in seen:
+                seen.add((func_name, json_str))
+                tool_calls.append({
+                    "id": f"call_extracted_{len(tool_calls)}",
+                    "type": "function",
+                    "function": {
+                        "name": func_name,
+                        "arguments": json_str
+                    }
+                })
+                logger.info("   ✅ Extracted %s from text (no parentheses format)", func_name)
         
         # Pattern 3: Python-style function calls with keyword arguments
         # Example: retrieve_city_guidance(query="Jaipur cultural trip", top_k=5)
-        pattern3 = rf'\b({"|".join(re.escape(name) for name in tool_names)})\s*\('
-        for match in re.finditer(pattern3, content):
+        for match in pattern3.finditer(content):
             func_name = match.group(1)
             start_pos = match.end()  # Position after opening paren
             
@@ -315,66 +454,17 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
             
             if args_str:
                 try:
-                    # Convert Python kwargs to JSON
-                    # Handle: query="value", top_k=5 -> {"query": "value", "top_k": 5}
-                    import ast
-                    # Try to parse as Python literal (handles strings, numbers, etc.)
-                    # For kwargs, we need to construct a dict
-                    kwargs_dict = {}
-                    # Split by comma, but respect quoted strings
-                    parts = []
-                    current = ""
-                    in_quotes = False
-                    quote_char = None
-                    for char in args_str:
-                        if char in ['"', "'"] and (not current or current[-1] != '\\'):
-                            if not in_quotes:
-                                in_quotes = True
-                                quote_char = char
-                            elif char == quote_char:
-                                in_quotes = False
-                                quote_char = None
-                        elif char == ',' and not in_quotes:
-                            if current.strip():
-                                parts.append(current.strip())
-                            current = ""
-                            continue
-                        current += char
-                    if current.strip():
-                        parts.append(current.strip())
-                    
-                    # Parse each part as key=value
-                    for part in parts:
-                        if '=' in part:
-                            key, value = part.split('=', 1)
-                            key = key.strip()
-                            value = value.strip()
-                            # Remove quotes from value
-                            if value.startswith('"') and value.endswith('"'):
-                                value = value[1:-1]
-                            elif value.startswith("'") and value.endswith("'"):
-                                value = value[1:-1]
-                            # Try to convert to number if possible
-                            try:
-                                if '.' in value:
-                                    value = float(value)
-                                else:
-                                    value = int(value)
-                            except ValueError:
-                                pass
-                            kwargs_dict[key] = value
+                    # Convert Python kwargs to JSON by parsing them as a call
+                    # Handle: query="value", top_k=5, interests=["culture", "food"]
+                    # -> {"query": "value", "top_k": 5, "interests": ["culture", "food"]}
+                    call = ast.parse(f"_f({args_str})", mode="eval").body
+                    kwargs_dict = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
                     
                     if kwargs_dict:
-                        json_str = json.dumps(kwargs_dict)
+                        json_str = orjson.dumps(kwargs_dict).decode()
                         # Check for duplicates
-                        already_added = False
-                        for tc in tool_calls:
-                            if (tc.get("function", {}).get("name") == func_name and 
-                                tc.get("function", {}).get("arguments", "") == json_str):
-                                already_added = True
-                                break
-                        
-                        if not already_added:
+                        if (func_name, json_str) not in seen:
+                            seen.add((func_name, json_str))
                             tool_calls.append({
                                 "id": f"call_extracted_{len(tool_calls)}",
                                 "type": "function",
@@ -383,12 +473,48 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                                     "arguments": json_str
                                 }
                             })
-                            logger.info(f"   ✅ Extracted {func_name} from text (Python kwargs format)")
-                except Exception as e:
-                    logger.debug(f"   Failed to parse Python kwargs for {func_name}: {e}")
+                            logger.info("   ✅ Extracted %s from text (Python kwargs format)", func_name)
+                except (SyntaxError, ValueError, TypeError) as e:
+                    logger.debug("   Failed to parse Python kwargs for %s: %s", func_name, e)
         
         return tool_calls
     
+    def _validate_tools(self, tools: List[Dict]) -> List[Dict]:
+        """
+        Tools in the right format for the API, others are logged and dropped
+        
+        Callers pass the same tools list every turn, so the result for the last
+        list seen is reused (the list must not be modified in place), along with
+        the text patterns for its tool names.
+        """
+        cached = self._validated_tools
+        if cached is not None and cached[0] is tools:
+            return cached[1]
+        
+        # Verify tools format is correct (OpenAI-compatible)
+        # Format should be: [{"type": "function", "function": {"name": "...", "description": "...", "parameters": {...}}}]
+        validated_tools = []
+        for tool in tools:
+            if isinstance(tool, dict):
+                # Ensure it has the correct structure
+                if tool.get("type") == "function" and tool.get("function"):
+                    validated_tools.append(tool)
+                else:
+                    logger.warning("⚠️  Invalid tool format: %s, skipping", list(tool.keys()))
+            else:
+                logger.warning("⚠️  Tool is not a dict: %s, skipping", type(tool))
+        
+        tool_names = tuple(t['function'].get('name', '') for t in validated_tools)
+        self._validated_tools = (tools, validated_tools, _compile_tool_patterns(tool_names))
+        return validated_tools
+    
+    def _tool_patterns(self, tools: List[Dict]) -> Tuple[re.Pattern, ...]:
+        """Text patterns for the tool names (precomputed when tools were validated)"""
+        cached = self._validated_tools
+        if cached is not None and cached[0] is tools:
+            return cached[2]
+        return _compile_tool_patterns(tuple(t.get('function', {}).get('name', '') for t in tools))
+    
     def chat_completion(self, messages: List[Dict], tools: Optional[List[Dict]] = None,
                        tool_choice: str = "auto", temperature: float = 0.7) -> Dict:
         """
@@ -405,251 +531,74 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
         """
         try:
             # Clean messages
-            cleaned_messages = self._clean_messages(messages)
+            cleaned_messages = list(self._iter_cleaned_messages(messages))
             
             # Log request
-            logger.info(f"Cerebras request: {len(cleaned_messages)} messages, {len(tools) if tools else 0} tools")
-            if tools:
+            logger.info("Cerebras request: %d messages, %d tools", len(cleaned_messages), len(tools) if tools else 0)
+            if tools and logger.isEnabledFor(logging.INFO):
                 tool_names = [t.get('function', {}).get('name', 'unknown') for t in tools]
-                logger.info(f"   Tool names: {tool_names}")
-            
-            # Final validation and fixing: Ensure all tool messages have required fields BEFORE creating payload
-            tool_message_indices = []
-            for i, msg in enumerate(cleaned_messages):
-                if msg.get("role") == "tool":
-                    tool_message_indices.append(i)
-                    tool_obj = msg.get("tool")
-                    
-                    # Check if tool object exists and has required fields
-                    needs_fix = False
-                    if not tool_obj:
-                        logger.error(f"❌ Tool message {i} missing 'tool' object entirely! Message keys: {list(msg.keys())}")
-                        needs_fix = True
-                        tool_obj = {}
-                    else:
-                        # Check required fields
-                        if not tool_obj.get("tool_call_id"):
-                            logger.error(f"❌ Tool message {i} missing tool_call_id in tool object")
-                            needs_fix = True
-                        if not tool_obj.get("content"):
-                            logger.error(f"❌ Tool message {i} missing content in tool object")
-                            needs_fix = True
-                    
-                    # Fix the message if needed
-                    if needs_fix or not tool_obj:
-                        # Get values from top-level or nested object
-                        tool_call_id = tool_obj.get("tool_call_id") or msg.get("tool_call_id")
-                        name = tool_obj.get("name") or msg.get("name", "")
-                        content = tool_obj.get("content") or msg.get("content", "{}")
-                        
-                        if not tool_call_id:
-                            logger.error(f"❌ Cannot fix tool message {i} - no tool_call_id found anywhere. Removing message.")
-                            # Mark for removal
-                            cleaned_messages[i] = None
-                            continue
-                        
-                        # Ensure content is a string
-                        if not content or content == "":
-                            content = "{}"
-                        elif not isinstance(content, str):
-                            try:
-                                content = json.dumps(content) if content else "{}"
-                            except:
-                                content = str(content) if content else "{}"
-                        
-                        # Recreate the message with proper structure
-                        cleaned_messages[i] = {
-                            "role": "tool",
-                            "tool": {
-                                "tool_call_id": str(tool_call_id),
-                                "name": str(name) if name else "",
-                                "content": str(content)
-                            }
-                        }
-                        logger.warning(f"⚠️  Fixed tool message {i} - tool_call_id: {str(tool_call_id)[:20]}..., content_length: {len(str(content))}")
-            
-            # Remove any None messages (invalid ones we couldn't fix)
-            cleaned_messages = [msg for msg in cleaned_messages if msg is not None]
-            
-            # CRITICAL: Completely rebuild ALL tool messages from cleaned_messages BEFORE creating payload
-            # Cerebras expects FLAT structure: {"role": "tool", "tool_call_id": "...", "content": "..."}
-            final_messages = []
-            for i, msg in enumerate(cleaned_messages):
-                if msg.get("role") == "tool":
-                    # Extract values - handle both nested (from our code) and flat (standard) formats
-                    tool_obj = msg.get("tool", {})
-                    tool_call_id = msg.get("tool_call_id") or tool_obj.get("tool_call_id")
-                    name = msg.get("name") or tool_obj.get("name", "")
-                    content = msg.get("content") or tool_obj.get("content", "{}")
-                    
-                    # Ensure all are strings and non-empty
-                    tool_call_id = str(tool_call_id).strip() if tool_call_id else ""
-                    name = str(name).strip() if name else ""
-                    content = str(content).strip() if content else "{}"
-                    
-                    if not tool_call_id:
-                        logger.error(f"❌ CRITICAL: Message {i} has empty tool_call_id after all processing! Skipping.")
-                        continue
-                    
-                    # Recreate with FLAT structure (Cerebras format)
-                    final_msg = {
-                        "role": "tool",
-                        "tool_call_id": tool_call_id,
-                        "content": content
-                    }
-                    
-                    # Add name if provided (optional)
-                    if name:
-                        final_msg["name"] = name
-                    
-                    # Verify the structure
-                    if "tool_call_id" not in final_msg:
-                        logger.error(f"❌ CRITICAL: Recreated message {i} missing 'tool_call_id' key!")
-                    elif not final_msg.get("tool_call_id"):
-                        logger.error(f"❌ CRITICAL: Recreated message {i} has empty tool_call_id!")
-                    elif "content" not in final_msg:
-                        logger.error(f"❌ CRITICAL: Recreated message {i} missing 'content' key!")
-                    elif not final_msg.get("content"):
-                        logger.error(f"❌ CRITICAL: Recreated message {i} has empty content!")
-                    else:
-                        logger.info(f"✅ Recreated tool message {i}: tool_call_id={tool_call_id[:20]}..., content_len={len(content)}")
-                    
-                    final_messages.append(final_msg)
-                else:
-                    # Non-tool messages - keep as-is
-                    final_messages.append(msg)
+                logger.info("   Tool names: %s", tool_names)
             
-            # NOW build request payload with rebuilt messages
+            # Build request payload (serialized once, with orjson, when it is sent)
             payload = {
                 "model": self.model,
-                "messages": final_messages,
+                "messages": cleaned_messages,
                 "temperature": temperature
             }
             
             # Add tools if provided
             if tools:
-                # Verify tools format is correct (OpenAI-compatible)
-                # Format should be: [{"type": "function", "function": {"name": "...", "description": "...", "parameters": {...}}}]
-                validated_tools = []
-                for tool in tools:
-                    if isinstance(tool, dict):
-                        # Ensure it has the correct structure
-                        if tool.get("type") == "function" and tool.get("function"):
-                            validated_tools.append(tool)
-                        else:
-                            logger.warning(f"⚠️  Invalid tool format: {list(tool.keys())}, skipping")
-                    else:
-                        logger.warning(f"⚠️  Tool is not a dict: {type(tool)}, skipping")
+                validated_tools = self._validate_tools(tools)
                 
                 if validated_tools:
                     payload["tools"] = validated_tools
                     # Log tools structure for debugging
-                    logger.info(f"Cerebras: Tools structure - {len(validated_tools)} validated tools")
-                    if validated_tools:
+                    logger.info("Cerebras: Tools structure - %d validated tools", len(validated_tools))
+                    if logger.isEnabledFor(logging.DEBUG):
                         first_tool = validated_tools[0]
                         func_info = first_tool.get('function', {})
-                        logger.debug(f"   First tool: type={first_tool.get('type')}, name={func_info.get('name', 'N/A')}, has_params={bool(func_info.get('parameters'))}")
+                        logger.debug("   First tool: type=%s, name=%s, has_params=%s", first_tool.get('type'),
+                                     func_info.get('name', 'N/A'), bool(func_info.get('parameters')))
                     
                     # Handle tool_choice
                     if tool_choice == "none":
                         payload["tool_choice"] = "none"
-                        logger.debug(f"   tool_choice: none (tools disabled)")
+                        logger.debug("   tool_choice: none (tools disabled)")
                     elif isinstance(tool_choice, dict) and tool_choice.get("type") == "function":
                         payload["tool_choice"] = tool_choice
-                        logger.debug(f"   tool_choice: specific function {tool_choice.get('function', {}).get('name', 'unknown')}")
+                        logger.debug("   tool_choice: specific function %s", tool_choice.get('function', {}).get('name', 'unknown'))
                     else:
                         # For "auto", explicitly set it to encourage tool usage
                         # Some Cerebras models may need explicit "auto" to trigger tool calls
                         payload["tool_choice"] = "auto"
-                        logger.debug(f"   tool_choice: auto (model should use tools when appropriate)")
+                        logger.debug("   tool_choice: auto (model should use tools when appropriate)")
                 else:
                     logger.error(f"❌ No valid tools after validation! Original tools: {len(tools)}")
             else:
-                logger.debug(f"   No tools provided")
-            
-            # Final verification: Check what we're actually sending
-            tool_count = 0
-            for i, msg in enumerate(payload["messages"]):
-                if msg.get("role") == "tool":
-                    tool_count += 1
-                    # Cerebras uses FLAT structure, not nested
-                    tool_call_id = msg.get("tool_call_id")
-                    content = msg.get("content")
-                    if not tool_call_id:
-                        logger.error(f"❌ CRITICAL FINAL: Message {i} missing 'tool_call_id'! Full msg: {json.dumps(msg)}")
-                    elif not content:
-                        logger.error(f"❌ CRITICAL FINAL: Message {i} missing 'content'! Full msg: {json.dumps(msg)}")
-                    else:
-                        logger.info(f"✅ FINAL VERIFIED message {i}: tool_call_id={str(tool_call_id)[:20]}..., content_len={len(str(content))}")
+                logger.debug("   No tools provided")
             
-            logger.info(f"Cerebras: Final payload has {tool_count} tool messages, {len(payload['messages'])} total messages")
-            
-            # CRITICAL: Serialize to JSON and verify structure one more time
-            try:
-                payload_json_str = json.dumps(payload)
-                payload_verified = json.loads(payload_json_str)
-                
-                # Check tool messages in serialized form (Cerebras uses FLAT format)
-                for i, msg in enumerate(payload_verified.get("messages", [])):
-                    if msg.get("role") == "tool":
-                        tool_call_id = msg.get("tool_call_id")
-                        content = msg.get("content")
-                        if not tool_call_id:
-                            logger.error(f"❌ SERIALIZATION CHECK: Message {i} lost 'tool_call_id' after JSON serialization!")
-                            logger.error(f"   Message after serialization: {json.dumps(msg, indent=2)}")
-                        elif not content:
-                            logger.error(f"❌ SERIALIZATION CHECK: Message {i} lost 'content' after JSON serialization!")
-                        else:
-                            logger.info(f"✅ SERIALIZATION CHECK: Message {i} structure intact after JSON serialization")
-                
-                # Use verified payload
-                payload = payload_verified
-            except Exception as e:
-                logger.error(f"❌ Error in serialization check: {e}")
-                # Continue with original payload
+            if logger.isEnabledFor(logging.INFO):
+                tool_count = sum(1 for msg in cleaned_messages if msg["role"] == "tool")
+                logger.info("Cerebras: Final payload has %d tool messages, %d total messages", tool_count, len(cleaned_messages))
             
             # Make API request
-            url = f"{self.base_url}/chat/completions"
-            logger.debug(f"Cerebras: Sending request with {len(payload['messages'])} messages")
-            
-            # Log actual JSON being sent (for debugging)
-            try:
-                json_to_send = json.dumps(payload)
-                # Extract just tool messages for logging (Cerebras uses FLAT format)
-                tool_msgs_json = []
-                for msg in payload.get("messages", []):
-                    if msg.get("role") == "tool":
-                        tool_msgs_json.append({
-                            "role": msg.get("role"),
-                            "has_tool_call_id": "tool_call_id" in msg,
-                            "tool_call_id": str(msg.get("tool_call_id", "MISSING"))[:30],
-                            "has_content": "content" in msg,
-                            "content_len": len(str(msg.get("content", "")))
-                        })
-                logger.info(f"Cerebras: Tool messages in JSON payload: {json.dumps(tool_msgs_json, indent=2)}")
-                
-                # Log tools being sent
-                if payload.get("tools"):
-                    tools_summary = []
-                    for tool in payload.get("tools", []):
-                        func_info = tool.get("function", {})
-                        tools_summary.append({
-                            "type": tool.get("type"),
-                            "name": func_info.get("name", "N/A"),
-                            "has_params": bool(func_info.get("parameters"))
-                        })
-                    logger.info(f"Cerebras: Tools in payload: {json.dumps(tools_summary, indent=2)}")
-                    logger.debug(f"Cerebras: tool_choice={payload.get('tool_choice', 'not set')}")
-            except Exception as e:
-                logger.warning(f"Could not log payload structure: {e}")
+            logger.debug("Cerebras: Sending request with %d messages", len(payload['messages']))
+            
+            # Log tools being sent (for debugging) - validated tools are all dicts
+            if payload.get("tools") and logger.isEnabledFor(logging.INFO):
+                tools_summary = []
+                for tool in payload["tools"]:
+                    func_info = tool.get("function", {})
+                    tools_summary.append({
+                        "type": tool.get("type"),
+                        "name": func_info.get("name", "N/A"),
+                        "has_params": bool(func_info.get("parameters"))
+                    })
+                logger.info("Cerebras: Tools in payload: %s", orjson.dumps(tools_summary, option=orjson.OPT_INDENT_2).decode())
+                logger.debug("Cerebras: tool_choice=%s", payload.get('tool_choice', 'not set'))
             
             try:
-                response = requests.post(
-                    url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60
-                )
+                response = self._post(self.chat_url, orjson.dumps(payload))
             except requests.exceptions.ConnectionError as e:
                 # Handle DNS resolution failures and connection errors
                 error_str = str(e)
@@ -670,10 +619,22 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
             
             # Check for errors
             if response.status_code != 200:
-                error_data = response.json() if response.content else {}
-                error_msg = error_data.get("error", {}).get("message", response.text) or error_data.get("message", response.text)
-                error_code = error_data.get("error", {}).get("code", str(response.status_code))
-                error_type = error_data.get("error", {}).get("type") or error_data.get("type", "unknown")
+                # The body is read once and decoded straight from bytes; it is only
+                # decoded to text if no message can be found in it
+                raw = response.content
+                try:
+                    error_data = orjson.loads(raw) if raw else {}
+                except orjson.JSONDecodeError:
+                    # e.g. an HTML error page from a proxy - fall back to the raw text below
+                    error_data = {}
+                if not isinstance(error_data, dict):
+                    error_data = {}
+                error_info = error_data.get("error")
+                if not isinstance(error_info, dict):
+                    error_info = {}
+                error_msg = error_info.get("message") or error_data.get("message") or response.text
+                error_code = error_info.get("code", str(response.status_code))
+                error_type = error_info.get("type") or error_data.get("type", "unknown")
                 
                 # Check for server errors (503, 502, 504) - these are temporary and should be retried
                 if response.status_code in [502, 503, 504]:
@@ -681,7 +642,7 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                     if error_type:
                         error_detail += f" (type: {error_type})"
                     logger.warning(f"⚠️  Cerebras API server error ({response.status_code}): {error_msg}")
-                    logger.info(f"   This is a temporary server issue. The request will be retried or fallback will be used.")
+                    logger.info("   This is a temporary server issue. The request will be retried or fallback will be used.")
                     raise Exception(f"Cerebras API error ({response.status_code}): {error_detail}")
                 
                 # Check for rate limit
@@ -696,22 +657,26 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                     
                     # Extract failed_generation from error
                     failed_gen = None
-                    failed_gen_data = error_data.get("error", {}).get("failed_generation")
+                    failed_gen_data = error_info.get("failed_generation")
                     if failed_gen_data:
+                        # Usually structured in the error body - no need to scan the message
                         failed_gen = failed_gen_data
-                    else:
-                        # Try to extract from error message string
-                        failed_match = re.search(r"'failed_generation':\s*'([^']+)'", error_msg)
+                    elif "failed_generation" in error_msg:
+                        # Try to extract from error message string (a substring check is
+                        # far cheaper than running the regexes over a long message)
+                        failed_match = _FAILED_GEN_SQ_RE.search(error_msg)
                         if failed_match:
                             failed_gen = failed_match.group(1)
                         else:
-                            failed_match = re.search(r'"failed_generation":\s*"([^"]+)"', error_msg)
+                            failed_match = _FAILED_GEN_DQ_RE.search(error_msg)
                             if failed_match:
                                 failed_gen = failed_match.group(1)
                     
                     if failed_gen:
-                        logger.info(f"   Extracted failed_generation: {failed_gen[:200]}...")
+                        logger.info("   Extracted failed_generation: %.200s...", failed_gen)
                         tool_calls = []
+                        # Names of the available tools, to validate extracted calls against
+                        tool_names = frozenset(t.get('function', {}).get('name', '') for t in tools) if tools else frozenset()
                         
                         # First, try to parse as JSON format (Cerebras sometimes returns JSON)
                         try:
@@ -720,11 +685,11 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                             if isinstance(failed_gen, str):
                                 # Try parsing as JSON first
                                 try:
-                                    failed_gen_parsed = json.loads(failed_gen)
+                                    failed_gen_parsed = orjson.loads(failed_gen)
                                 except json.JSONDecodeError:
                                     # Not JSON, will try Python format later
                                     pass
-                            elif isinstance(failed_gen, dict):
+                            elif isinstance(failed_gen, (dict, list)):
                                 # Already parsed
                                 failed_gen_parsed = failed_gen
                             
@@ -738,28 +703,16 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                                         # Parse the arguments (which is itself a JSON string)
                                         try:
                                             if isinstance(func_args_str, str):
-                                                func_args = json.loads(func_args_str)
+                                                func_args = orjson.loads(func_args_str)
                                             else:
                                                 func_args = func_args_str
                                             
                                             # Validate function name is in our tools
                                             if tools:
-                                                tool_names = [t.get('function', {}).get('name', '') for t in tools]
                                                 if func_name in tool_names:
-                                                    tool_call_id = f"call_cerebras_{len(tool_calls)}"
-                                                    func_obj = type('Function', (), {
-                                                        'name': func_name,
-                                                        'arguments': json.dumps(func_args)
-                                                    })()
-                                                    
-                                                    tool_call_obj = type('ToolCall', (), {
-                                                        'id': tool_call_id,
-                                                        'type': 'function',
-                                                        'function': func_obj
-                                                    })()
-                                                    
-                                                    tool_calls.append(tool_call_obj)
-                                                    logger.info(f"   ✅ Extracted function call from JSON: {func_name} with {len(func_args)} arguments")
+                                                    tool_calls.append(_make_tool_call(func_name, orjson.dumps(func_args).decode(),
+                                                                                      f"call_cerebras_{len(tool_calls)}"))
+                                                    logger.info("   ✅ Extracted function call from JSON: %s with %d arguments", func_name, len(func_args))
                                                 else:
                                                     logger.warning(f"   Function '{func_name}' not in available tools, skipping")
                                             else:
@@ -776,127 +729,82 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                                             if func_name and func_args_str:
                                                 try:
                                                     if isinstance(func_args_str, str):
-                                                        func_args = json.loads(func_args_str)
+                                                        func_args = orjson.loads(func_args_str)
                                                     else:
                                                         func_args = func_args_str
                                                     
                                                     if tools:
-                                                        tool_names = [t.get('function', {}).get('name', '') for t in tools]
                                                         if func_name in tool_names:
-                                                            tool_call_id = f"call_cerebras_{len(tool_calls)}"
-                                                            func_obj = type('Function', (), {
-                                                                'name': func_name,
-                                                                'arguments': json.dumps(func_args)
-                                                            })()
-                                                            
-                                                            tool_call_obj = type('ToolCall', (), {
-                                                                'id': tool_call_id,
-                                                                'type': 'function',
-                                                                'function': func_obj
-                                                            })()
-                                                            
-                                                            tool_calls.append(tool_call_obj)
-                                                            logger.info(f"   ✅ Extracted function call from JSON list: {func_name}")
+                                                            tool_calls.append(_make_tool_call(func_name, orjson.dumps(func_args).decode(),
+                                                                                              f"call_cerebras_{len(tool_calls)}"))
+                                                            logger.info("   ✅ Extracted function call from JSON list: %s", func_name)
                                                 except json.JSONDecodeError as e:
                                                     logger.warning(f"   Failed to parse arguments for {func_name}: {e}")
                         except Exception as json_parse_error:
-                            logger.debug(f"   JSON parsing failed: {json_parse_error}, will try Python format...")
+                            logger.debug("   JSON parsing failed: %s, will try Python format...", json_parse_error)
                         except Exception as e:
-                            logger.debug(f"   JSON parsing attempt failed: {e}, trying Python format...")
+                            logger.debug("   JSON parsing attempt failed: %s, trying Python format...", e)
                         
                         # If no tool calls extracted from JSON, try Python format
                         if not tool_calls:
                             # Parse function calls from Python format: function_name(arg1=value1, arg2=value2)
                             # Handle multiple function calls separated by newlines
-                            lines = failed_gen.split('\n') if isinstance(failed_gen, str) else [str(failed_gen)]
+                            lines = failed_gen.splitlines() if isinstance(failed_gen, str) else [str(failed_gen)]
                             
-                            for line in lines:
-                                line = line.strip()
-                                if not line:
+                            # Blank lines are dropped without a per-line check
+                            for line in filter(None, map(str.strip, lines)):
+                                # Only a line starting with a name and containing "(" can be a
+                                # call - cheaper to check than running the regex on prose
+                                if '(' not in line or not line[:1].isidentifier():
                                     continue
                                 
                                 # Match function call pattern: function_name(...)
-                                func_match = re.match(r'(\w+)\s*\((.*)\)', line)
+                                func_match = _FUNC_CALL_RE.match(line)
                                 if func_match:
                                     func_name = func_match.group(1)
                                     args_str = func_match.group(2)
                                     
                                     # Skip if it contains list comprehensions (can't parse those)
-                                    if '[' in args_str and 'for' in args_str and 'in' in args_str:
-                                        logger.warning(f"   Skipping {func_name} - contains list comprehension (cannot parse)")
+                                    # For build_itinerary with list comp, we'll skip it and let it be called after search_pois completes
+                                    if 'for' in args_str and 'in' in args_str:
+                                        logger.warning("   Skipping %s - arguments contain list comprehensions: %.100s", func_name, args_str)
                                         continue
                                     
                                     # Try to parse arguments as Python dict/kwargs
                                     try:
-                                        # Check if args contain list comprehensions or function calls (too complex to parse)
-                                        if 'for' in args_str and 'in' in args_str:
-                                            logger.warning(f"   Skipping {func_name} - arguments contain list comprehensions: {args_str[:100]}")
-                                            # For build_itinerary with list comp, we'll skip it and let it be called after search_pois completes
+                                        # Parsed as written - no need to rewrite Python syntax into JSON first
+                                        # It is serialized once, below, when the tool call is built
+                                        func_args = _parse_call_arguments(args_str)
+                                        if func_args is None:
+                                            logger.warning(f"   Cannot parse arguments for {func_name}: {args_str[:100]}")
                                             continue
                                         
-                                        # Convert Python dict syntax to JSON
-                                        # Replace single quotes with double quotes, handle None -> null
-                                        args_json_str = args_str.replace("'", '"').replace('None', 'null').replace('True', 'true').replace('False', 'false')
-                                        
-                                        # Try to parse as JSON (might need to wrap in braces)
-                                        try:
-                                            if args_json_str.strip().startswith('{'):
-                                                func_args = json.loads(args_json_str)
-                                            else:
-                                                # Try wrapping in braces for kwargs format
-                                                func_args = json.loads('{' + args_json_str + '}')
-                                        except json.JSONDecodeError:
-                                            # If JSON parsing fails, try ast.literal_eval for safe Python literal parsing
-                                            try:
-                                                import ast
-                                                # Parse as Python literal (handles dicts, lists, strings, etc.)
-                                                parsed = ast.literal_eval('{' + args_str + '}')
-                                                # Convert to JSON-serializable format
-                                                func_args = json.loads(json.dumps(parsed))
-                                            except:
-                                                logger.warning(f"   Cannot parse arguments for {func_name}: {args_str[:100]}")
-                                                continue
+                                        # Either parser can yield a non-dict (e.g. a set from "{'a'}"),
+                                        # checked once here rather than failing later at serialization
+                                        if not isinstance(func_args, dict):
+                                            logger.warning("   Arguments for %s are not a dict, skipping", func_name)
+                                            continue
                                         
                                         # Validate function name is in our tools
                                         if tools:
-                                            tool_names = [t.get('function', {}).get('name', '') for t in tools]
                                             if func_name not in tool_names:
                                                 logger.warning(f"   Function '{func_name}' not in available tools, skipping")
                                                 continue
                                         
-                                        # Create tool call object
-                                        tool_call_id = f"call_cerebras_{len(tool_calls)}"
-                                        func_obj = type('Function', (), {
-                                            'name': func_name,
-                                            'arguments': json.dumps(func_args)
-                                        })()
-                                        
-                                        tool_call_obj = type('ToolCall', (), {
-                                            'id': tool_call_id,
-                                            'type': 'function',
-                                            'function': func_obj
-                                        })()
-                                        
-                                        tool_calls.append(tool_call_obj)
-                                        logger.info(f"   ✅ Extracted function call: {func_name} with {len(func_args)} arguments")
+                                        tool_calls.append(_make_tool_call(func_name, orjson.dumps(func_args).decode(),
+                                                                          f"call_cerebras_{len(tool_calls)}"))
+                                        logger.info("   ✅ Extracted function call: %s with %d arguments", func_name, len(func_args))
                                         
                                     except Exception as parse_error:
                                         logger.warning(f"   Failed to parse {func_name} arguments: {parse_error}")
                                         continue
                         
                         if tool_calls:
-                            logger.info(f"   ✅ Successfully extracted {len(tool_calls)} tool call(s) from error")
+                            logger.info("   ✅ Successfully extracted %d tool call(s) from error", len(tool_calls))
                             # Create message object with extracted tool calls
-                            message_obj = type('Message', (), {
-                                'content': None,
-                                'tool_calls': tool_calls
-                            })()
+                            message_obj = _Message(content=None, tool_calls=tool_calls)
                             
-                            usage_obj = type('Usage', (), {
-                                'prompt_tokens': 0,
-                                'completion_tokens': 0,
-                                'total_tokens': 0
-                            })()
+                            usage_obj = _Usage()
                             
                             return {
                                 "message": message_obj,
@@ -917,17 +825,18 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
                 raise Exception(f"Cerebras API error ({response.status_code}): {error_detail}")
             
             # Parse response
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Log full response structure for debugging
-            logger.debug(f"Cerebras response structure: choices={len(data.get('choices', []))}, has_usage={bool(data.get('usage'))}")
+            logger.debug("Cerebras response structure: choices=%d, has_usage=%s", len(data.get('choices', [])), bool(data.get('usage')))
             
             # Extract message and tool_calls
             choice = data.get("choices", [{}])[0]
             message_data = choice.get("message", {})
             
             # Log message structure
-            logger.debug(f"Cerebras message structure: has_content={bool(message_data.get('content'))}, has_tool_calls={bool(message_data.get('tool_calls'))}, content_preview={str(message_data.get('content', ''))[:100] if message_data.get('content') else 'None'}...")
+            logger.debug("Cerebras message structure: has_content=%s, has_tool_calls=%s, content_preview=%.100s...",
+                         bool(message_data.get('content')), bool(message_data.get('tool_calls')), message_data.get('content'))
             
             # Build message object
             message_content = message_data.get("content")
@@ -935,19 +844,19 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
             
             # Log tool calls if present
             if tool_calls_data:
-                logger.info(f"✅ Cerebras returned {len(tool_calls_data)} tool call(s)")
-                for i, tc in enumerate(tool_calls_data):
-                    func_name = tc.get("function", {}).get("name", "unknown")
-                    logger.debug(f"   Tool call {i+1}: {func_name}")
+                logger.info("✅ Cerebras returned %d tool call(s)", len(tool_calls_data))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for i, tc in enumerate(tool_calls_data):
+                        logger.debug("   Tool call %d: %s", i + 1, tc.get("function", {}).get("name", "unknown"))
             else:
                 logger.warning(f"⚠️  Cerebras returned NO tool calls. Message keys: {list(message_data.keys())}")
                 if message_content:
                     logger.warning(f"   Response content: {message_content[:200]}...")
                     # Post-process to extract function calls from text (like Groq)
-                    logger.info(f"   🔍 Checking if function calls are embedded in text content...")
+                    logger.info("   🔍 Checking if function calls are embedded in text content...")
                     extracted_tool_calls = self._extract_tool_calls_from_text(message_content, tools)
                     if extracted_tool_calls:
-                        logger.info(f"   ✅ Extracted {len(extracted_tool_calls)} tool call(s) from text!")
+                        logger.info("   ✅ Extracted %d tool call(s) from text!", len(extracted_tool_calls))
                         tool_calls_data = extracted_tool_calls
                         # Clear content since we have tool calls now
                         message_content = None
@@ -955,36 +864,22 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
             # Convert tool_calls to expected format (objects with attributes, not dicts)
             tool_calls = []
             for tc in tool_calls_data:
-                # Create function object
-                func_obj = type('Function', (), {
-                    'name': tc.get("function", {}).get("name", ""),
-                    'arguments': tc.get("function", {}).get("arguments", "{}")
-                })()
-                
-                # Create tool call object
-                tool_call_obj = type('ToolCall', (), {
-                    'id': tc.get("id", ""),
-                    'type': tc.get("type", "function"),
-                    'function': func_obj
-                })()
-                
-                tool_calls.append(tool_call_obj)
+                function = tc.get("function", {})
+                tool_calls.append(_make_tool_call(function.get("name", ""), function.get("arguments", "{}"),
+                                                  tc.get("id", ""), tc.get("type", "function")))
             
             # Create message object (similar to Groq/Gemini format)
-            message_obj = type('Message', (), {
-                'content': message_content if message_content else None,
-                'tool_calls': tool_calls if tool_calls else None
-            })()
+            message_obj = _Message(message_content or None, tool_calls or None)
             
             # Create usage object
             usage_data = data.get("usage", {})
-            usage_obj = type('Usage', (), {
-                'prompt_tokens': usage_data.get("prompt_tokens", 0),
-                'completion_tokens': usage_data.get("completion_tokens", 0),
-                'total_tokens': usage_data.get("total_tokens", 0)
-            })()
+            usage_obj = _Usage(
+                prompt_tokens=usage_data.get("prompt_tokens", 0),
+                completion_tokens=usage_data.get("completion_tokens", 0),
+                total_tokens=usage_data.get("total_tokens", 0)
+            )
             
-            logger.info(f"✅ Cerebras response: {len(tool_calls)} tool calls, {usage_obj.total_tokens} tokens")
+            logger.info("✅ Cerebras response: %d tool calls, %s tokens", len(tool_calls), usage_obj.total_tokens)
             
             return {
                 "message": message_obj,
@@ -1006,3 +901,14 @@ When user asks to edit/modify/remove/change activities (e.g., "remove Day 1 morn
             logger.error(f"Cerebras API error: {error_str}")
             raise
 
+
+@lru_cache(maxsize=4)
+def get_cerebras_client(model: str = "llama-3.3-70b") -> CerebrasClient:
+    """
+    Get shared Cerebras client instance for a model
+    
+    Use this rather than CerebrasClient() so switching back to Cerebras reuses
+    the client (and what it has cached) instead of building a new one.
+    """
+    return CerebrasClient(model=model)
+
@@ -98,6 +98,12 @@ Your role:
         Returns:
             Response dict with message and tool_calls
         """
+        # Tool names are needed for logging, text extraction and validation alike,
+        # so they (and the alternation used by the extraction patterns) are built once
+        tool_names = [t.get('function', {}).get('name', '') for t in tools] if tools else []
+        tool_name_set = frozenset(tool_names)
+        tool_names_pattern = '|'.join(map(re.escape, tool_names))
+        
         try:
             # Clean messages - ensure tool responses are in correct format
             cleaned_messages = self._clean_messages(messages)
@@ -105,7 +111,6 @@ Your role:
             # Log tool configuration
             logger.info(f"Groq request: {len(cleaned_messages)} messages, {len(tools) if tools else 0} tools")
             if tools:
-                tool_names = [t.get('function', {}).get('name', 'unknown') for t in tools]
                 logger.info(f"   Tool names: {tool_names}")
             
             # Build request parameters
@@ -179,9 +184,7 @@ Your role:
                 direct_function_matches = []
                 # Find function names that are in our tools list, followed directly by {
                 if tools:
-                    tool_names = [t.get('function', {}).get('name', '') for t in tools]
-                    # Create pattern that matches any of our tool names followed by {
-                    tool_names_pattern = '|'.join(re.escape(name) for name in tool_names)
+                    # Pattern that matches any of our tool names followed by {
                     pattern = rf'\b({tool_names_pattern})\s*{{'
                     logger.debug(f"   Searching for pattern: {pattern[:100]}...")
                     
@@ -227,9 +230,7 @@ Your role:
                 # Find all potential function calls: word followed by opening paren and brace
                 # Make sure we only match valid function names (word characters only, no parentheses)
                 if tools:
-                    tool_names = [t.get('function', {}).get('name', '') for t in tools]
                     # Match any tool name followed by ( and {
-                    tool_names_pattern = '|'.join(re.escape(name) for name in tool_names)
                     pattern = rf'\b({tool_names_pattern})\s*\(\s*{{'
                     func_calls = re.finditer(pattern, message.content)
                 else:
@@ -242,13 +243,6 @@ Your role:
                     func_name = func_name.rstrip('()').strip()
                     start_pos = match.end() - 1  # Position of opening brace
                     
-                    # #region agent log
-                    try:
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H5","location":"groq_client.py:217","message":"Found plain text function call pattern","data":{"func_name_raw":match.group(1),"func_name_clean":func_name,"start_pos":start_pos},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    
                     # Extract JSON by finding balanced braces
                     brace_count = 0
                     json_str = ""
@@ -327,13 +321,6 @@ Your role:
                         # Use cleaned function name
                         func_name = func_name_clean
                         
-                        # #region agent log
-                        try:
-                            with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H5","location":"groq_client.py:286","message":"Extracting function call","data":{"original_name":func_name_clean,"args_length":len(func_args_str)},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
-                        
                         # Try to parse the arguments
                         try:
                             # The args might be in the format: {"key": "value"} or just the JSON
@@ -350,25 +337,11 @@ Your role:
                             
                             # Validate function name is in our tools
                             if tools:
-                                tool_names = [t.get('function', {}).get('name', '') for t in tools]
                                 logger.info(f"      Available tools: {tool_names}")
                                 
-                                # #region agent log
-                                try:
-                                    with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H5","location":"groq_client.py:308","message":"Validating function name","data":{"func_name":func_name,"in_tools":func_name in tool_names,"tool_names":tool_names},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                except: pass
-                                # #endregion
-                                
-                                if func_name not in tool_names:
+                                if func_name not in tool_name_set:
                                     logger.warning(f"      ❌ Function '{func_name}' not in available tools, skipping")
                                     logger.warning(f"      Available tools are: {tool_names}")
-                                    # #region agent log
-                                    try:
-                                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H5","location":"groq_client.py:315","message":"Function name validation failed","data":{"func_name":func_name,"reason":"not_in_tools"},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                    except: pass
-                                    # #endregion
                                     continue
                                 logger.info(f"      ✅ Function '{func_name}' is in available tools")
                             
@@ -428,25 +401,11 @@ Your role:
             error_str = str(e)
             logger.error(f"Groq API error: {error_str}")
             
-            # #region agent log
-            try:
-                with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:416","message":"Groq API exception caught","data":{"error_type":type(e).__name__,"error_str_preview":error_str[:500],"has_tool_use_failed":"tool_use_failed" in error_str.lower()},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-            except: pass
-            # #endregion
-            
             # Check for tool_use_failed errors - extract function calls from wrapped format
             if "tool_use_failed" in error_str.lower():
                 logger.warning("⚠️  Groq tool calling failed - model generated wrapped function calls (known llama-3.3-70b-versatile bug)")
                 logger.info("   Attempting to extract function calls from error message...")
                 
-                # #region agent log
-                try:
-                    with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:421","message":"tool_use_failed detected","data":{"error_str_length":len(error_str)},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                
                 # Try multiple patterns to extract the failed generation
                 failed_gen = None
                 
@@ -456,12 +415,6 @@ Your role:
                 function_call_match = re.search(r'<function=[^<]+</function>', error_str)
                 if function_call_match:
                     failed_gen = function_call_match.group(0)
-                    # #region agent log
-                    try:
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:440","message":"Extracted via function call pattern","data":{"failed_gen":failed_gen},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
                 else:
                     # Fallback: Try to extract from 'failed_generation' key
                     # Pattern 1: 'failed_generation': '...'
@@ -501,35 +454,16 @@ Your role:
                 
                 if not failed_gen:
                     logger.warning(f"   Could not extract failed_generation from error message")
-                    # #region agent log
-                    try:
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:450","message":"Failed to extract failed_generation","data":{"error_str_sample":error_str[:1000]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
                     # Try to extract directly from error_str if failed_gen not found
                     failed_gen = error_str
                 
                 if failed_gen:
                     logger.debug(f"   Failed generation: {failed_gen[:300]}")
-                    # #region agent log
-                    try:
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:444","message":"Extracted failed_generation","data":{"failed_gen_preview":failed_gen[:500]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
                     
                     # Use the same robust pattern matching as the main post-processing
                     # This ensures we catch all the same formats
                     all_matches = []
                     
-                    # #region agent log
-                    try:
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:475","message":"Starting pattern matching","data":{"failed_gen_length":len(failed_gen),"failed_gen_full":failed_gen,"has_function_tag":"<function=" in failed_gen},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    
                     # Pattern 1: function=name{json} format (no parentheses)
                     function_equals_pattern = r'function\s*=\s*(\w+)\s*(\{.*?\})'
                     for match in re.finditer(function_equals_pattern, failed_gen, re.DOTALL):
@@ -592,19 +526,11 @@ Your role:
                                 # Handle both formats: <function=name({json})</function> and <function=name({json}</function>
                                 # Also handle cases where there's no closing paren: <function=name({json}</function>
                                 if '</function>' in remaining:
-                                    # #region agent log
-                                    try:
-                                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:538","message":"Found XML-wrapped pattern","data":{"func_name":func_name,"json_preview":json_str[:100],"remaining_preview":remaining[:50]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                    except: pass
-                                    # #endregion
                                     all_matches.append((func_name, json_str, "XML-wrapped-with-paren"))
                                 break
                     
                     # Pattern 3: Plain text function calls: function_name({"arg": "value"})
                     if tools:
-                        tool_names = [t.get('function', {}).get('name', '') for t in tools]
-                        tool_names_pattern = '|'.join(re.escape(name) for name in tool_names)
                         pattern = rf'\b({tool_names_pattern})\s*\(\s*{{'
                         func_calls = re.finditer(pattern, failed_gen)
                     else:
@@ -630,8 +556,6 @@ Your role:
                     
                     # Pattern 4: Direct function_name{json} (no prefix, no parentheses)
                     if tools:
-                        tool_names = [t.get('function', {}).get('name', '') for t in tools]
-                        tool_names_pattern = '|'.join(re.escape(name) for name in tool_names)
                         pattern = rf'\b({tool_names_pattern})\s*{{'
                         for match in re.finditer(pattern, failed_gen):
                             func_name = match.group(1).strip()
@@ -649,13 +573,6 @@ Your role:
                                     all_matches.append((func_name, json_str, "direct_no_paren"))
                                     break
                     
-                    # #region agent log
-                    try:
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H6","location":"groq_client.py:480","message":"Pattern matching results","data":{"matches_count":len(all_matches),"matches":[(name, pattern_type) for name, _, pattern_type in all_matches],"failed_gen_sample":failed_gen[:200]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    
                     if not all_matches:
                         logger.warning(f"   No function call patterns matched in failed_generation")
                         raise Exception(f"Groq model (llama-3.3-70b-versatile) generated function calls wrapped in XML tags. Failed to extract function call from error message.")
@@ -695,8 +612,7 @@ Your role:
                         
                         # Validate function name is in our tools
                         if tools:
-                            tool_names = [t.get('function', {}).get('name', '') for t in tools]
-                            if func_name not in tool_names:
+                            if func_name not in tool_name_set:
                                 logger.warning(f"   Function '{func_name}' not in available tools, skipping")
                                 raise Exception(f"Groq model (llama-3.3-70b-versatile) generated function calls wrapped in XML tags. Failed to extract function call from error message.")
                         
@@ -33,21 +33,33 @@ class LLMClient:
         self.provider = provider
         self.current_provider = provider  # Track current active provider
         
+        # Provider clients created so far, kept for switching back and forth -
+        # each holds its own pool of keep-alive connections to its API
+        self.clients: Dict[str, object] = {}
+        
         # Initialize the primary client
-        if provider == "cerebras":
-            from .cerebras_client import CerebrasClient
-            self.client = CerebrasClient()
-            logger.info(f"✅ Using Cerebras as primary LLM provider")
-        elif provider == "gemini":
-            from .gemini_client import GeminiClient
-            self.client = GeminiClient()
-            logger.info(f"✅ Using Gemini as primary LLM provider")
-        elif provider == "groq":
-            from .groq_client import GroqClient
-            self.client = GroqClient()
-            logger.info(f"✅ Using Groq as primary LLM provider")
-        else:
+        if provider not in ("cerebras", "groq", "gemini"):
             raise ValueError(f"Unknown LLM provider: {provider}. Use 'cerebras', 'groq', or 'gemini'")
+        self.client = self._get_client(provider)
+        logger.info(f"✅ Using {provider.capitalize()} as primary LLM provider")
+    
+    def _get_client(self, provider: str):
+        """Client for a provider, created on first use"""
+        client = self.clients.get(provider)
+        if client is None:
+            if provider == "cerebras":
+                from .cerebras_client import get_cerebras_client
+                client = get_cerebras_client()
+            elif provider == "groq":
+                from .groq_client import GroqClient
+                client = GroqClient()
+            elif provider == "gemini":
+                from .gemini_client import GeminiClient
+                client = GeminiClient()
+            else:
+                raise ValueError(f"Unknown provider: {provider}")
+            self.clients[provider] = client
+        return client
     
     def get_system_prompt(self) -> str:
         """Get the system prompt"""
@@ -114,22 +126,12 @@ class LLMClient:
         """
         logger.info(f"🔄 Switching provider from {self.current_provider} to {new_provider}...")
         
-        if new_provider == "cerebras":
-            from .cerebras_client import CerebrasClient
-            self.client = CerebrasClient()
-            self.current_provider = "cerebras"
-        elif new_provider == "groq":
-            from .groq_client import GroqClient
-            self.client = GroqClient()
-            self.current_provider = "groq"
+        # Reuses the provider's client (and its open connections) if it was used before
+        self.client = self._get_client(new_provider)
+        self.current_provider = new_provider
+        if new_provider == "groq":
             # Clean messages for Groq if coming from Gemini
             messages = self._clean_messages_for_groq(messages)
-        elif new_provider == "gemini":
-            from .gemini_client import GeminiClient
-            self.client = GeminiClient()
-            self.current_provider = "gemini"
-        else:
-            raise ValueError(f"Unknown provider: {new_provider}")
         
         logger.info(f"✅ Switched to {new_provider}")
         return messages
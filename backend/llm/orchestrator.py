@@ -4,10 +4,12 @@ LLM Orchestrator - Handles LLM calls with function calling
 
 from .llm_client import LLMClient
 from .functions import get_function_definitions
-from core.session_manager import SessionManager
+from core.session_manager import get_session_manager
 from core.response_cache import get_cache
 from core.tool_cache import get_tool_cache
-from typing import Dict, List, Optional
+from core.http_client import get_http_session
+from typing import Callable, Dict, List, Optional
+from contextlib import ExitStack
 import json
 import logging
 import hashlib
@@ -31,12 +33,17 @@ class LLMOrchestrator:
         """
         self.llm_client = LLMClient(provider=provider)
         self.functions = get_function_definitions()
-        self.session_manager = SessionManager()
+        self.session_manager = get_session_manager()
+        # Pooled HTTP session shared by tools making outbound API calls
+        self.http_session = get_http_session()
         # Function handlers (will be registered in Phase 3)
         self.function_handlers = {}
         # Caching
         self.response_cache = get_cache()
         self.tool_cache = get_tool_cache()
+        for function in self.functions:
+            definition = function["function"]
+            self.tool_cache.register_key_builder(definition["name"], definition["parameters"].get("properties", {}))
         # Tools hash for cache key
         self.tools_hash = hashlib.md5(json.dumps(self.functions, sort_keys=True).encode()).hexdigest()
         logger.info(f"LLM Orchestrator initialized with provider: {self.llm_client.provider}")
@@ -89,10 +96,17 @@ class LLMOrchestrator:
         self.function_handlers[function_name] = handler
         logger.info(f"Registered handler for function: {function_name}")
     
-    def process_user_request(self, user_message: str, session_id: str) -> Dict:
+    def process_user_request(self, user_message: str, session_id: str,
+                             on_event: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         Process user request through LLM with function calling
         
+        Args:
+            user_message: The user's message
+            session_id: Session ID
+            on_event: Optional callback for progress events (tool calls and results),
+                      e.g. for streaming them to the client
+        
         Returns:
             {
                 "response": str,
@@ -101,6 +115,12 @@ class LLMOrchestrator:
                 "usage": Dict
             }
         """
+        with ExitStack() as stack:
+            return self._process_user_request(user_message, session_id, on_event, stack)
+    
+    def _process_user_request(self, user_message: str, session_id: str,
+                              on_event: Optional[Callable[[Dict], None]], stack: ExitStack) -> Dict:
+        """Process user request (see process_user_request); claims are released when stack closes"""
         # Get session
         session = self.session_manager.get_session(session_id)
         if not session:
@@ -145,8 +165,14 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
         is_itinerary_request = any(keyword in user_message.lower() for keyword in 
                                    ['plan', 'itinerary', 'trip', 'day', 'edit', 'change', 'modify'])
         
+        # Holds the claim on this prompt; released early once the reply is known not
+        # to be cached (it has tool calls), so waiters don't sit out the whole loop
+        cache_claim = stack.enter_context(ExitStack())
         if not is_itinerary_request:
             cached_response = self.response_cache.get(messages, self.tools_hash)
+            # If the same prompt is already being answered in this session, wait for that response instead of calling the LLM again
+            if not cached_response and not cache_claim.enter_context(self.response_cache.single_flight(messages, self.tools_hash, scope=session_id)):
+                cached_response = self.response_cache.get(messages, self.tools_hash)
             if cached_response:
                 logger.info("✅ Using cached response")
                 self.session_manager.add_message(session_id, "user", user_message)
@@ -181,23 +207,6 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                 # Call LLM (Groq or Gemini)
                 logger.info(f"Calling {self.llm_client.provider.upper()} with {len(messages)} messages, {len(self.functions)} tools available")
                 
-                # #region agent log
-                try:
-                    msg_details = []
-                    for i, m in enumerate(messages[-5:]):  # Last 5 messages
-                        msg_info = {"index":len(messages)-5+i,"role":m.get("role")}
-                        if m.get("role") == "tool":
-                            msg_info["tool_name"] = m.get("name")
-                            msg_info["content_length"] = len(m.get("content",""))
-                            msg_info["tool_call_id"] = m.get("tool_call_id")
-                        elif m.get("role") == "assistant" and m.get("tool_calls"):
-                            msg_info["tool_calls"] = [tc.get("function",{}).get("name","unknown") for tc in m.get("tool_calls",[])]
-                        msg_details.append(msg_info)
-                    with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H2,H3,H4","location":"orchestrator.py:134","message":"About to call LLM","data":{"iteration":iteration,"messages_count":len(messages),"recent_messages":msg_details,"all_tool_calls_so_far":[tc.get("function") for tc in all_tool_calls]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                except: pass
-                # #endregion
-                
                 # Log last user message for context
                 if messages:
                     last_msg = messages[-1]
@@ -240,18 +249,12 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                 
                 # Check if LLM wants to call functions
                 if message.tool_calls:
+                    # Replies that needed tools are not cached - let waiting requests call the LLM now
+                    cache_claim.close()
                     logger.info(f"🔧 LLM requested {len(message.tool_calls)} tool call(s)")
-                    tool_call_names = [tc.function.name for tc in message.tool_calls]
                     for tc in message.tool_calls:
                         logger.info(f"   - {tc.function.name}")
                     
-                    # #region agent log
-                    try:
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H3","location":"orchestrator.py:179","message":"LLM requested tool calls","data":{"iteration":iteration,"tool_calls":tool_call_names,"previous_tool_calls":[tc.get("function") for tc in all_tool_calls]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    
                     # Add assistant message with tool calls
                     messages.append({
                         "role": "assistant",
@@ -305,13 +308,8 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                         })
                         
                         logger.info(f"Executing function: {function_name}")
-                        
-                        # #region agent log
-                        try:
-                            with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H1","location":"orchestrator.py:236","message":"About to execute function","data":{"function_name":function_name,"function_args_keys":list(function_args.keys()) if isinstance(function_args,dict) else "not_dict","iteration":iteration},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
+                        if on_event:
+                            on_event({"type": "tool_call", "function": function_name})
                         
                         # Check tool cache first
                         cached_result = self.tool_cache.get(function_name, function_args)
@@ -324,16 +322,6 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                                 result = self.function_handlers[function_name](**function_args)
                                 logger.info(f"✅ Function {function_name} executed successfully")
                                 
-                                # #region agent log
-                                try:
-                                    result_summary = {"result_type":type(result).__name__,"result_keys":list(result.keys()) if isinstance(result,dict) else "not_dict","result_size":len(str(result))}
-                                    if isinstance(result,dict) and "pois" in result:
-                                        result_summary["pois_count"] = len(result.get("pois",[]))
-                                    with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H1","location":"orchestrator.py:247","message":"Function executed - result summary","data":{"function_name":function_name,"result":result_summary},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                except: pass
-                                # #endregion
-                                
                                 # Cache the result (except for build_itinerary which is session-specific)
                                 if function_name != "build_itinerary":
                                     self.tool_cache.set(function_name, function_args, result)
@@ -345,6 +333,7 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                                         session = self.session_manager.get_session(session_id)
                                         if session:
                                             session["current_itinerary"] = result.get("itinerary")
+                                            session["itinerary_normalized"] = False
                                             self.session_manager.update_session(session_id, session)
                                             logger.info(f"✅ Stored itinerary in session ({len(result.get('itinerary', {}))} days)")
                                     else:
@@ -358,6 +347,7 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                                             if "sources" not in session:
                                                 session["sources"] = []
                                             session["sources"].extend(result.get("citations", []))
+                                            session["sources_version"] = session.get("sources_version", 0) + 1
                                             self.session_manager.update_session(session_id, session)
                                             logger.info(f"✅ Stored {len(result.get('citations', []))} citations in session")
                                     else:
@@ -395,6 +385,7 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                                                 if "sources" not in session:
                                                     session["sources"] = []
                                                 session["sources"].extend(poi_sources)
+                                                session["sources_version"] = session.get("sources_version", 0) + 1
                                                 self.session_manager.update_session(session_id, session)
                                                 logger.info(f"✅ Stored {len(poi_sources)} sources from POI search in session")
                                 
@@ -418,30 +409,23 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                             logger.error(f"⚠️  Skipping tool result addition due to parsing failure. Stopping iteration.")
                             break
                         
+                        if on_event:
+                            on_event({
+                                "type": "tool_result",
+                                "function": function_name,
+                                "status": "error" if isinstance(result, dict) and "error" in result else "success"
+                            })
+                        
                         # Add tool result to messages
                         # Ensure result is JSON serializable and optimize for token usage
                         try:
                             result_json = json.dumps(result)
                             
-                            # #region agent log
-                            try:
-                                with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H1,H2","location":"orchestrator.py:300","message":"Before truncation","data":{"function_name":function_name,"result_json_length":len(result_json),"result_json_preview":result_json[:500]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                            except: pass
-                            # #endregion
-                            
                             # Aggressive truncation to reduce token usage
                             if len(result_json) > 5000:  # Reduced threshold from 10000
                                 logger.warning(f"Tool result is large ({len(result_json)} chars), truncating...")
                                 result_truncated = json.loads(result_json)
                                 
-                                # #region agent log
-                                try:
-                                    with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H1","location":"orchestrator.py:306","message":"Truncating large result","data":{"function_name":function_name,"original_size":len(result_json)},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                                except: pass
-                                # #endregion
-                                
                                 if isinstance(result_truncated, dict):
                                     # For POI search, aggressively limit and simplify
                                     if "pois" in result_truncated:
@@ -492,13 +476,6 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                         messages.append(tool_result_message)
                         logger.info(f"✅ Added {function_name} result to messages (size: {len(result_json)} chars)")
                         
-                        # #region agent log
-                        try:
-                            with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H2,H4","location":"orchestrator.py:355","message":"Tool result added to messages","data":{"function_name":function_name,"tool_call_id":tool_call.id,"result_size":len(result_json),"messages_count":len(messages),"last_3_messages_roles":[m.get("role") for m in messages[-3:]]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                        except: pass
-                        # #endregion
-                    
                     # If parsing failed, don't continue - break out of iteration loop
                     if parsing_failed:
                         logger.error(f"⚠️  Parsing failed for tool calls. Stopping iterations to prevent rate limiting.")
@@ -507,14 +484,6 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                     # Continue loop to get LLM response with tool results
                     logger.info("🔄 Continuing to next iteration with tool results...")
                     
-                    # #region agent log
-                    try:
-                        msg_summary = [{"role":m.get("role"),"has_content":bool(m.get("content")),"has_tool_calls":bool(m.get("tool_calls")),"tool_call_count":len(m.get("tool_calls",[])) if m.get("tool_calls") else 0} for m in messages[-5:]]
-                        with open(r'e:\Tech\Work Folders\Trip Planner Product\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H3,H4","location":"orchestrator.py:363","message":"Before next LLM call","data":{"iteration":iteration,"messages_count":len(messages),"recent_messages":msg_summary,"all_tool_calls_so_far":[tc.get("function") for tc in all_tool_calls]},"timestamp":int(__import__('time').time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    
                     continue
                 else:
                     # LLM has final response (no tool calls)
@@ -609,7 +578,7 @@ IMPORTANT: When editing this itinerary, you MUST call build_itinerary again with
                 tools=self.functions,
                 tool_choice="none"  # Force no more tool calls
             )
-            final_response = response["message"].content
+            final_response = response["message"].content or ""
             logger.info("✅ Got final response after max iterations")
         except Exception as e:
             logger.error(f"Failed to get final response: {e}")
@@ -4,9 +4,15 @@ Voice Travel Planner Backend
 """
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from api.middleware import SelectiveGZipMiddleware
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 from dotenv import load_dotenv
+from core.http_client import close_http_session
+from core.session_manager import get_session_manager, sessions_are_shared
 import logging
 
 # Load environment variables
@@ -23,7 +29,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Voice Travel Planner API",
     description="AI-powered voice-first travel planning assistant for Jaipur",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -36,6 +43,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON responses (itineraries with sources are a few KB of repetitive keys)
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")),
+    exclude_paths=["/api/trip/chat/stream", "/api/voice/chat", "/api/voice/synthesize"]
+)
+
 @app.get("/")
 def root():
     """Root endpoint"""
@@ -50,6 +64,25 @@ def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+# Registered before the routers so it runs before their startup hooks (which
+# already offload work to the default executor configured here)
+@app.on_event("startup")
+async def startup_event():
+    """Initialize services on startup"""
+    logger.info("Starting Voice Travel Planner API...")
+    # Sessions, per-session chat state and the in-process caches belong to one
+    # worker - several workers are only correct with sessions in Redis
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 and not sessions_are_shared():
+        raise RuntimeError("WEB_CONCURRENCY > 1 requires the Redis session store "
+                           "(set REDIS_URL and SESSION_BACKEND=redis), or run a single worker")
+    # Blocking LLM/STT/TTS calls are offloaded with asyncio.to_thread, which uses
+    # the loop's default executor - bound it so concurrency is predictable
+    max_workers = int(os.getenv("THREADPOOL_MAX_WORKERS", "32"))
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+    logger.info(f"Default thread pool configured (max_workers: {max_workers})")
+    # Sweep expired sessions in the background rather than on the request path
+    await get_session_manager().start()
+
 # Import and register routers
 try:
     from api.routes import trip, voice
@@ -61,14 +94,22 @@ try:
 except ImportError as e:
     logger.warning(f"Could not import routes: {e}")
 
-# @app.on_event("startup")
-# async def startup_event():
-#     """Initialize services on startup"""
-#     logger.info("Starting Voice Travel Planner API...")
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled resources on shutdown"""
+    await get_session_manager().stop()
+    close_http_session()
 
 if __name__ == "__main__":
     import uvicorn
     host = os.getenv("BACKEND_HOST", "0.0.0.0")
     port = int(os.getenv("BACKEND_PORT", 8000))
-    uvicorn.run(app, host=host, port=port, reload=True)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1 and not sessions_are_shared():
+        logger.warning("WEB_CONCURRENCY > 1 requires the Redis session store, running a single worker")
+        workers = 1
+    # Auto-reload only works with a single worker process
+    reload = workers == 1 and os.getenv("BACKEND_RELOAD", "true").lower() == "true"
+    # loop/http default to "auto", which picks uvloop/httptools where installed
+    uvicorn.run("main:app", host=host, port=port, reload=reload, workers=workers)
 
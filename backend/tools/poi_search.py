@@ -10,6 +10,7 @@ import time
 from math import radians, cos, sin, asin, sqrt
 import os
 from dotenv import load_dotenv
+from core.http_client import get_http_session
 
 load_dotenv()
 
@@ -21,7 +22,9 @@ class POISearch:
     Search for Points of Interest in Jaipur using OpenStreetMap
     """
     
-    def __init__(self):
+    def __init__(self, http_session: Optional[requests.Session] = None):
+        # Shared pooled session so repeated Overpass queries reuse connections
+        self.http_session = http_session or get_http_session()
         # Jaipur coordinates (center)
         self.jaipur_lat = 26.9124
         self.jaipur_lon = 75.7873
@@ -57,7 +60,7 @@ class POISearch:
                     break
                 
                 # Overpass API expects query in request body with proper content type
-                response = requests.post(
+                response = self.http_session.post(
                     self.overpass_url,
                     data=query,
                     headers={'Content-Type': 'application/x-www-form-urlencoded'},
@@ -12,7 +12,10 @@ import logging
 import subprocess
 import tempfile
 from typing import Optional, Dict
+import requests
 from dotenv import load_dotenv
+from core.http_client import get_http_session
+from voice.audio_io import AudioInput, audio_size, read_header, write_audio
 
 load_dotenv()
 
@@ -25,7 +28,6 @@ try:
 except ImportError:
     SDK_AVAILABLE = False
     logger.warning("AssemblyAI SDK not installed. Install with: pip install assemblyai")
-    import requests
 
 
 class AssemblyAISTTClient:
@@ -35,12 +37,14 @@ class AssemblyAISTTClient:
     Uses the official AssemblyAI SDK for reliable file handling.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_session: Optional[requests.Session] = None):
         """
         Initialize AssemblyAI STT client
         
         Args:
             api_key: AssemblyAI API key. If not provided, reads from ASSEMBLYAI_API_KEY env var
+            http_session: Optional requests session for the manual API calls
+                (defaults to get_http_session(); the SDK manages its own connections)
         """
         self.api_key = api_key or os.getenv("ASSEMBLYAI_API_KEY")
         if not self.api_key:
@@ -66,14 +70,15 @@ class AssemblyAISTTClient:
             self.base_url = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.assemblyai.com/v2")
             self.upload_endpoint = f"{self.base_url}/upload"
             self.transcript_endpoint = f"{self.base_url}/transcript"
+            self.http_session = http_session or get_http_session()
             logger.warning("⚠️ Using manual API calls (SDK not available)")
     
-    def _convert_webm_to_wav(self, audio_data: bytes) -> bytes:
+    def _convert_webm_to_wav(self, audio_data: AudioInput) -> bytes:
         """
         Convert WebM audio to WAV format using ffmpeg
         
         Args:
-            audio_data: WebM audio bytes
+            audio_data: WebM audio bytes or binary file
             
         Returns:
             WAV audio bytes (PCM 16-bit, 16kHz, mono)
@@ -82,7 +87,7 @@ class AssemblyAISTTClient:
         
         # Create temporary files
         with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as input_file:
-            input_file.write(audio_data)
+            write_audio(input_file, audio_data)
             input_path = input_file.name
         
         with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as output_file:
@@ -156,7 +161,7 @@ class AssemblyAISTTClient:
             except Exception as validation_error:
                 raise ValueError(f"WAV validation failed: {validation_error}")
             
-            logger.info(f"✅ Conversion successful: {len(audio_data)} bytes → {len(wav_data)} bytes")
+            logger.info(f"✅ Conversion successful: {audio_size(audio_data)} bytes → {len(wav_data)} bytes")
             return wav_data
             
         except FileNotFoundError:
@@ -180,7 +185,7 @@ class AssemblyAISTTClient:
     
     def transcribe(
         self,
-        audio_data: bytes,
+        audio_data: AudioInput,
         language: str = "en",
         model: Optional[str] = None
     ) -> Dict:
@@ -188,7 +193,7 @@ class AssemblyAISTTClient:
         Transcribe audio to text using AssemblyAI
         
         Args:
-            audio_data: Audio file bytes (any format)
+            audio_data: Audio file bytes or binary file (any format)
             language: Language code (default: "en")
             model: Optional model name (e.g., "best" for best accuracy)
         
@@ -200,14 +205,16 @@ class AssemblyAISTTClient:
                 "confidence": float,  # Confidence score (0-1)
             }
         """
-        if not audio_data:
+        size = audio_size(audio_data)
+        if not size:
             raise ValueError("audio_data cannot be empty")
         
-        logger.info(f"📤 Starting transcription (input size: {len(audio_data)} bytes, language: {language})")
+        logger.info(f"📤 Starting transcription (input size: {size} bytes, language: {language})")
         
         # Convert WebM to WAV if needed
-        is_wav = audio_data.startswith(b"RIFF") and b"WAVE" in audio_data[:12]
-        is_mp3 = audio_data.startswith(b"\xff\xfb") or audio_data.startswith(b"ID3")
+        header = read_header(audio_data)
+        is_wav = header.startswith(b"RIFF") and b"WAVE" in header
+        is_mp3 = header.startswith(b"\xff\xfb") or header.startswith(b"ID3")
         
         if not (is_wav or is_mp3):
             logger.info("🔄 Converting WebM to WAV for AssemblyAI compatibility...")
@@ -223,7 +230,7 @@ class AssemblyAISTTClient:
             logger.info("🎙️ Using manual API calls for transcription")
             return self._transcribe_with_requests(audio_data, language, model)
     
-    def _transcribe_with_sdk(self, audio_data: bytes, language: str, model: Optional[str]) -> Dict:
+    def _transcribe_with_sdk(self, audio_data: AudioInput, language: str, model: Optional[str]) -> Dict:
         """Transcribe using official AssemblyAI SDK"""
         import tempfile
         import io
@@ -250,8 +257,12 @@ class AssemblyAISTTClient:
             try:
                 logger.info("📤 Uploading audio using SDK upload_file method...")
                 # Create a file-like object from bytes
-                audio_file = io.BytesIO(audio_data)
-                audio_file.name = "audio.wav"  # Set filename for SDK
+                if isinstance(audio_data, (bytes, bytearray)):
+                    audio_file = io.BytesIO(audio_data)
+                    audio_file.name = "audio.wav"  # Set filename for SDK
+                else:
+                    audio_file = audio_data
+                    audio_file.seek(0)
                 
                 # Upload using SDK (handles format detection automatically)
                 upload_url = self.transcriber.upload_file(audio_file)
@@ -264,7 +275,7 @@ class AssemblyAISTTClient:
                 logger.warning(f"SDK upload_file failed: {upload_error}, trying file path method...")
                 # Method 2: Fallback to file path (SDK handles file upload internally)
                 with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                    temp_file.write(audio_data)
+                    write_audio(temp_file, audio_data)
                     temp_path = temp_file.name
                 
                 try:
@@ -309,7 +320,7 @@ class AssemblyAISTTClient:
             logger.error(traceback.format_exc())
             raise
     
-    def _transcribe_with_requests(self, audio_data: bytes, language: str, model: Optional[str]) -> Dict:
+    def _transcribe_with_requests(self, audio_data: AudioInput, language: str, model: Optional[str]) -> Dict:
         """Fallback: Transcribe using manual API calls"""
         import requests
         import time
@@ -321,7 +332,7 @@ class AssemblyAISTTClient:
         
         # Save to temporary file for upload
         with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            temp_file.write(audio_data)
+            write_audio(temp_file, audio_data)
             temp_path = temp_file.name
         
         try:
@@ -345,7 +356,7 @@ class AssemblyAISTTClient:
                 "Content-Type": "application/octet-stream"
             }
             
-            upload_response = requests.post(
+            upload_response = self.http_session.post(
                 self.upload_endpoint,
                 headers=upload_headers,
                 data=audio_bytes,  # Send raw bytes, not multipart form
@@ -378,7 +389,7 @@ class AssemblyAISTTClient:
                 transcript_data["model"] = model
             
             logger.info(f"📝 Creating transcription job (language: {language_code})...")
-            transcript_response = requests.post(
+            transcript_response = self.http_session.post(
                 self.transcript_endpoint,
                 headers=headers,
                 json=transcript_data,
@@ -403,7 +414,7 @@ class AssemblyAISTTClient:
             # Poll for completion
             max_attempts = 60
             for attempt in range(max_attempts):
-                status_response = requests.get(
+                status_response = self.http_session.get(
                     f"{self.transcript_endpoint}/{transcript_id}",
                     headers=headers,
                     timeout=30
@@ -465,6 +476,4 @@ class AssemblyAISTTClient:
             Dict with transcription result
         """
         with open(file_path, "rb") as f:
-            audio_data = f.read()
-        
-        return self.transcribe(audio_data, language=language)
+            return self.transcribe(f, language=language)
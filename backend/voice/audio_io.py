@@ -0,0 +1,43 @@
+"""
+Helpers for audio passed either as bytes or as a binary file object
+
+Uploaded audio is handed to the STT clients as the upload's spooled file, so it
+is never copied into a single bytes object on the way through.
+"""
+
+from typing import BinaryIO, Union
+import os
+import shutil
+
+AudioInput = Union[bytes, BinaryIO]
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def audio_size(audio: AudioInput) -> int:
+    """Size of the audio in bytes"""
+    if isinstance(audio, (bytes, bytearray)):
+        return len(audio)
+    position = audio.tell()
+    size = audio.seek(0, os.SEEK_END)
+    audio.seek(position)
+    return size
+
+
+def read_header(audio: AudioInput, length: int = 12) -> bytes:
+    """First bytes of the audio (for format detection)"""
+    if isinstance(audio, (bytes, bytearray)):
+        return bytes(audio[:length])
+    audio.seek(0)
+    header = audio.read(length)
+    audio.seek(0)
+    return header
+
+
+def write_audio(destination: BinaryIO, audio: AudioInput):
+    """Write the audio to a file, copying file objects in chunks"""
+    if isinstance(audio, (bytes, bytearray)):
+        destination.write(audio)
+        return
+    audio.seek(0)
+    shutil.copyfileobj(audio, destination, COPY_CHUNK_SIZE)
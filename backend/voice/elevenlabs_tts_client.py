@@ -9,6 +9,7 @@ import requests
 from typing import Optional, Dict
 import logging
 from dotenv import load_dotenv
+from core.http_client import get_http_session
 from pathlib import Path
 
 # Load .env file from backend directory
@@ -26,13 +27,15 @@ class ElevenLabsTTSClient:
     ElevenLabs is a leading TTS service provider.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_session: Optional[requests.Session] = None):
         """
         Initialize ElevenLabs TTS client
         
         Args:
             api_key: ElevenLabs API key. If not provided, reads from ELEVENLABS_API_KEY env var
+            http_session: Optional requests session (defaults to get_http_session())
         """
+        self.http_session = http_session or get_http_session()
         # Debug: Check what's in the environment
         raw_key = api_key or os.getenv("ELEVENLABS_API_KEY")
         
@@ -172,7 +175,7 @@ class ElevenLabsTTSClient:
                 logger.warning(f"Unrecognized format '{format}', using 'mp3_44100_128'")
                 output_format = "mp3_44100_128"
             
-            response = requests.post(
+            response = self.http_session.post(
                 f"{self.tts_endpoint}/{voice_id}",
                 headers=headers,
                 json=payload,
@@ -10,6 +10,8 @@ import requests
 from typing import Optional, Dict
 import logging
 from dotenv import load_dotenv
+from core.http_client import get_http_session
+from voice.audio_io import AudioInput, audio_size
 
 load_dotenv()
 
@@ -25,13 +27,15 @@ class ElevenLabsSTTClient:
     with AssemblyAI or another STT provider.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_session: Optional[requests.Session] = None):
         """
         Initialize ElevenLabs STT client
         
         Args:
             api_key: ElevenLabs API key. If not provided, reads from ELEVENLABS_API_KEY env var
+            http_session: Optional requests session (defaults to get_http_session())
         """
+        self.http_session = http_session or get_http_session()
         self.api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
         if not self.api_key:
             raise ValueError("ELEVENLABS_API_KEY not found in environment variables")
@@ -63,7 +67,7 @@ class ElevenLabsSTTClient:
     
     def transcribe(
         self,
-        audio_data: bytes,
+        audio_data: AudioInput,
         language: str = "en",
         model: Optional[str] = None
     ) -> Dict:
@@ -71,7 +75,7 @@ class ElevenLabsSTTClient:
         Transcribe audio to text
         
         Args:
-            audio_data: Audio file bytes (WAV, MP3, etc.)
+            audio_data: Audio file bytes or binary file (WAV, MP3, etc.)
             language: Language code (default: "en")
             model: Optional model name (if ElevenLabs supports multiple STT models)
         
@@ -87,8 +91,11 @@ class ElevenLabsSTTClient:
             ValueError: If audio_data is empty
             requests.RequestException: If API request fails
         """
-        if not audio_data:
+        size = audio_size(audio_data)
+        if not size:
             raise ValueError("audio_data cannot be empty")
+        if not isinstance(audio_data, (bytes, bytearray)):
+            audio_data.seek(0)
         
         headers = {
             "xi-api-key": self.api_key,
@@ -112,9 +119,9 @@ class ElevenLabsSTTClient:
         }
         
         try:
-            logger.info(f"Transcribing audio (size: {len(audio_data)} bytes, language: {language})")
+            logger.info(f"Transcribing audio (size: {size} bytes, language: {language})")
             
-            response = requests.post(
+            response = self.http_session.post(
                 self.stt_endpoint,
                 headers=headers,
                 files=files,
@@ -139,7 +146,7 @@ class ElevenLabsSTTClient:
             logger.error(f"Request URL: {self.stt_endpoint}")
             logger.error(f"Request headers: xi-api-key present (length: {len(self.api_key)})")
             logger.error(f"Request data: model_id={model_id}, language={language}")
-            logger.error(f"Request files: file present (size: {len(audio_data)} bytes)")
+            logger.error(f"Request files: file present (size: {size} bytes)")
             
             # Provide more helpful error messages
             if e.response.status_code == 401:
@@ -174,8 +181,6 @@ class ElevenLabsSTTClient:
             Dict with transcription result
         """
         with open(file_path, "rb") as f:
-            audio_data = f.read()
-        
-        return self.transcribe(audio_data, language=language)
+            return self.transcribe(f, language=language)
 
 
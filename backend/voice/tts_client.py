@@ -10,6 +10,7 @@ import requests
 from typing import Optional, Dict
 import logging
 from dotenv import load_dotenv
+from core.http_client import get_http_session
 
 load_dotenv()
 
@@ -25,13 +26,15 @@ class AssemblyAITTSClient:
     with ElevenLabs or another TTS provider.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_session: Optional[requests.Session] = None):
         """
         Initialize AssemblyAI TTS client
         
         Args:
             api_key: AssemblyAI API key. If not provided, reads from ASSEMBLYAI_API_KEY env var
+            http_session: Optional requests session (defaults to get_http_session())
         """
+        self.http_session = http_session or get_http_session()
         self.api_key = api_key or os.getenv("ASSEMBLYAI_API_KEY")
         if not self.api_key:
             raise ValueError("ASSEMBLYAI_API_KEY not found in environment variables")
@@ -87,7 +90,7 @@ class AssemblyAITTSClient:
         try:
             logger.info(f"Synthesizing speech for text: {text[:100]}... (voice: {voice}, speed: {speed})")
             
-            response = requests.post(
+            response = self.http_session.post(
                 self.tts_endpoint,
                 headers=headers,
                 json=payload,
@@ -102,7 +105,7 @@ class AssemblyAITTSClient:
                 result = response.json()
                 # If API returns URL, fetch the audio
                 if "audio_url" in result:
-                    audio_response = requests.get(result["audio_url"], timeout=30)
+                    audio_response = self.http_session.get(result["audio_url"], timeout=30)
                     audio_response.raise_for_status()
                     audio_data = audio_response.content
                 elif "audio" in result:
@@ -27,6 +27,47 @@ export interface VoiceChatResponse {
   audio_url?: string;
 }
 
+function indexOfBytes(haystack: Uint8Array, needle: Uint8Array, from: number): number {
+  outer: for (let i = from; i <= haystack.length - needle.length; i++) {
+    for (let j = 0; j < needle.length; j++) {
+      if (haystack[i + j] !== needle[j]) continue outer;
+    }
+    return i;
+  }
+  return -1;
+}
+
+/**
+ * Split a multipart/mixed voice chat response into its JSON metadata part and MP3 part
+ */
+async function parseMultipartVoiceResponse(
+  response: Response,
+  boundary: string
+): Promise<{ metadata: any; audioBlob: Blob }> {
+  const body = new Uint8Array(await response.arrayBuffer());
+  const encoder = new TextEncoder();
+  const delimiter = encoder.encode(`--${boundary}`);
+  const headerEnd = encoder.encode('\r\n\r\n');
+
+  // First part: JSON metadata
+  const metadataStart = indexOfBytes(body, headerEnd, 0) + headerEnd.length;
+  const audioDelimiter = indexOfBytes(body, delimiter, metadataStart);
+  const metadata = JSON.parse(new TextDecoder().decode(body.subarray(metadataStart, audioDelimiter - 2)));
+
+  // Second part: audio, up to the closing delimiter (missing if the stream was cut short)
+  const audioStart = indexOfBytes(body, headerEnd, audioDelimiter) + headerEnd.length;
+  const closing = encoder.encode(`\r\n--${boundary}--\r\n`);
+  let audioEnd = body.length;
+  if (indexOfBytes(body, closing, body.length - closing.length) !== -1) {
+    audioEnd -= closing.length;
+  }
+
+  return {
+    metadata,
+    audioBlob: new Blob([body.subarray(audioStart, audioEnd)], { type: 'audio/mpeg' }),
+  };
+}
+
 export async function sendVoiceMessage(
   audioBlob: Blob,
   sessionId: string | null
@@ -69,6 +110,21 @@ export async function sendVoiceMessage(
     throw new Error(errorDetail);
   }
 
+  // Text and sources come in a JSON part ahead of the audio
+  const contentType = response.headers.get('Content-Type') || '';
+  const boundaryMatch = contentType.match(/^multipart\/mixed;\s*boundary=(.+)$/);
+  if (boundaryMatch) {
+    const { metadata, audioBlob: responseAudioBlob } = await parseMultipartVoiceResponse(response, boundaryMatch[1]);
+    return {
+      audioBlob: responseAudioBlob,
+      sessionId: metadata.session_id || sessionId || '',
+      transcribedText: metadata.transcribed_text || '',
+      aiResponse: metadata.ai_response || '',
+      sources: metadata.sources || [],
+    };
+  }
+
+  // Legacy format: text in base64 encoded headers
   // Get session ID from headers
   const newSessionId = response.headers.get('X-Session-Id') || sessionId || '';
   